@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Word 模板转换模块
+
+把 Word 模板（段落、表格、文字格式）转换为 HTML 模板，
+占位符 {字段名} / {{ 字段名 }} 转换为 Jinja2 变量 {{ 字段名 }}。
+转换只在模板文件变化时做一次，结果由 TemplateHandler 缓存
+"""
+
+import re
+from html import escape
+from docx import Document
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+
+class DocxConverter:
+    """Word 模板 -> HTML 模板转换器"""
+
+    # 转换规则变化时递增，使旧的转换缓存失效
+    CONVERTER_VERSION = 1
+
+    # 占位符：{{ 字段名 }} 或 {字段名}
+    PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*([^\W\d]\w*)\s*\}\}|\{\s*([^\W\d]\w*)\s*\}')
+
+    ALIGNMENTS = {
+        WD_ALIGN_PARAGRAPH.CENTER: 'center',
+        WD_ALIGN_PARAGRAPH.RIGHT: 'right',
+        WD_ALIGN_PARAGRAPH.JUSTIFY: 'justify',
+    }
+
+    PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <style>
+        body {{
+            font-family: "Microsoft YaHei UI", "微软雅黑", "SimSun", "宋体", Arial, sans-serif;
+            font-size: 15px;
+            line-height: 1.8;
+            color: #333333;
+            padding: 20px;
+            max-width: 680px;
+            margin: 0 auto;
+        }}
+        p {{
+            margin: 6px 0;
+        }}
+        table {{
+            border-collapse: collapse;
+            width: 100%;
+            margin: 10px 0;
+        }}
+        td {{
+            border: 1px solid #CCCCCC;
+            padding: 6px 10px;
+        }}
+    </style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+    def __init__(self, field_mapping=None):
+        """初始化转换器
+
+        Args:
+            field_mapping: 中文列名 -> 字段名 的映射，占位符写中文列名时转换为字段名
+        """
+        self.field_mapping = field_mapping or {}
+
+    def convert(self, docx_path):
+        """转换 Word 模板
+
+        Args:
+            docx_path: Word 模板路径
+
+        Returns:
+            HTML 模板文本（Jinja2 语法）
+        """
+        document = Document(docx_path)
+        parts = []
+        for child in document.element.body.iterchildren():
+            if child.tag == qn('w:p'):
+                parts.append(self._paragraph_html(Paragraph(child, document)))
+            elif child.tag == qn('w:tbl'):
+                parts.append(self._table_html(Table(child, document)))
+        return self.PAGE_TEMPLATE.format(body='\n'.join(parts))
+
+    def _paragraph_html(self, paragraph):
+        """段落转换为 <p> 或 <h1>~<h6>"""
+        tag = 'p'
+        style_name = paragraph.style.name if paragraph.style is not None else ''
+        if style_name.startswith('Heading '):
+            level = style_name.rsplit(' ', 1)[-1]
+            if level.isdigit() and 1 <= int(level) <= 6:
+                tag = f"h{level}"
+        elif style_name == 'Title':
+            tag = 'h1'
+
+        style = ''
+        align = self.ALIGNMENTS.get(paragraph.alignment)
+        if align:
+            style = f' style="text-align: {align};"'
+
+        content = self._runs_html(paragraph.runs)
+        return f"<{tag}{style}>{content or '&nbsp;'}</{tag}>"
+
+    def _runs_html(self, runs):
+        """把段落中的文字块转换为 HTML
+
+        占位符可能被 Word 拆在多个文字块中，先拼接整段文字找出占位符，
+        占位符使用其第一个字符所在文字块的格式
+        """
+        runs = [(run.text, self._run_tags(run)) for run in runs if run.text]
+        text = ''.join(run_text for run_text, _ in runs)
+        owners = []  # 每个字符所属文字块的序号
+        for idx, (run_text, _) in enumerate(runs):
+            owners.extend([idx] * len(run_text))
+
+        # [(HTML 片段, 文字块序号), ...]
+        pieces = []
+        position = 0
+        for match in self.PLACEHOLDER_PATTERN.finditer(text):
+            self._add_literal(pieces, text, owners, position, match.start())
+            field = match.group(1) or match.group(2)
+            field = self.field_mapping.get(field, field)
+            pieces.append(('{{ ' + field + ' }}', owners[match.start()]))
+            position = match.end()
+        self._add_literal(pieces, text, owners, position, len(text))
+
+        # 相邻且格式相同的片段合并后再套上格式标签
+        html = []
+        for idx in range(len(pieces)):
+            fragment, owner = pieces[idx]
+            if idx > 0 and pieces[idx - 1][1] == owner:
+                html[-1][0].append(fragment)
+            else:
+                html.append(([fragment], owner))
+        return ''.join(self._wrap(''.join(fragments), runs[owner][1]) for fragments, owner in html)
+
+    def _add_literal(self, pieces, text, owners, start, end):
+        """把一段普通文字按所属文字块切分后加入片段列表"""
+        position = start
+        while position < end:
+            owner = owners[position]
+            stop = position
+            while stop < end and owners[stop] == owner:
+                stop += 1
+            pieces.append((self._escape_text(text[position:stop]), owner))
+            position = stop
+
+    @staticmethod
+    def _escape_text(text):
+        """转义普通文字，同时避免与 Jinja2 语法冲突"""
+        text = escape(text, quote=False).replace('{', '&#123;').replace('}', '&#125;')
+        text = text.replace('\t', '&emsp;').replace('\n', '<br>')
+        # 保留连续空格
+        return text.replace('  ', ' &nbsp;')
+
+    @staticmethod
+    def _run_tags(run):
+        """文字块格式对应的 (开始标签, 结束标签) 列表"""
+        tags = []
+        if run.bold:
+            tags.append(('<strong>', '</strong>'))
+        if run.italic:
+            tags.append(('<em>', '</em>'))
+        if run.underline:
+            tags.append(('<u>', '</u>'))
+        color = run.font.color
+        if color is not None and color.type is not None and color.rgb is not None:
+            tags.append((f'<span style="color: #{color.rgb};">', '</span>'))
+        return tags
+
+    @staticmethod
+    def _wrap(content, tags):
+        """按顺序嵌套格式标签"""
+        for open_tag, _ in reversed(tags):
+            content = open_tag + content
+        for _, close_tag in reversed(tags):
+            content = content + close_tag
+        return content
+
+    def _table_html(self, table):
+        """表格转换为 <table>，横向合并的单元格转换为 colspan"""
+        rows = []
+        for row in table.rows:
+            cells = []
+            previous = None
+            for cell in row.cells:
+                # 合并单元格在 row.cells 中会重复出现
+                if previous is not None and cell._tc is previous[0]:
+                    previous[1] += 1
+                    continue
+                previous = [cell._tc, 1, cell]
+                cells.append(previous)
+
+            html = []
+            for _, span, cell in cells:
+                colspan = f' colspan="{span}"' if span > 1 else ''
+                content = '<br>'.join(self._runs_html(paragraph.runs) for paragraph in cell.paragraphs)
+                html.append(f"<td{colspan}>{content}</td>")
+            rows.append('<tr>' + ''.join(html) + '</tr>')
+        return '<table>\n' + '\n'.join(rows) + '\n</table>'
@@ -8,14 +8,86 @@
 
 import smtplib
 import imaplib
+import ssl
 import time
 import threading
+import heapq
+from datetime import datetime, timedelta
+from email import encoders
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.mime.nonmultipart import MIMENonMultipart
 from email.utils import formataddr
 from utils.logger import logger
 
 
+class CertificateError(ConnectionError):
+    """SMTP 服务器证书验证失败（自签名证书、证书与服务器地址不匹配等）"""
+
+
+class TLSSessionCache:
+    """TLS 会话缓存
+
+    所有连接共用一个 SSLContext，并按服务器记录最近一次的 TLS 会话，
+    重连或新建连接时复用会话，省去完整握手
+    """
+
+    def __init__(self):
+        self.context = ssl.create_default_context()
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get_session(self, key):
+        """获取已缓存的会话"""
+        with self._lock:
+            return self._sessions.get(key)
+
+    def save_session(self, key, sock):
+        """从已建立的 TLS 连接中保存会话
+
+        Args:
+            key: 会话键 (服务器, 端口)
+            sock: SSLSocket
+        """
+        session = getattr(sock, 'session', None)
+        if session is None:
+            return
+        with self._lock:
+            self._sessions[key] = session
+
+    def context_for(self, key):
+        """获取会复用指定服务器会话的 context"""
+        return _ResumingContext(self, key)
+
+
+class _ResumingContext:
+    """包装共享 SSLContext，握手时带上缓存的 TLS 会话
+
+    smtplib 只调用 context.wrap_socket(sock, server_hostname=...)，
+    无法直接传入 session，这里在包装层补上
+    """
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+
+    def wrap_socket(self, sock, server_hostname=None, **kwargs):
+        session = self.cache.get_session(self.key)
+        ssl_sock = self.cache.context.wrap_socket(
+            sock,
+            server_hostname=server_hostname,
+            session=session,
+            **kwargs
+        )
+        if session is not None:
+            logger.debug(f"TLS 会话复用: {'是' if ssl_sock.session_reused else '否'}")
+        return ssl_sock
+
+
+# 全局 TLS 会话缓存，所有 SMTP 连接共用
+tls_session_cache = TLSSessionCache()
+
+
 class EmailSender:
     """邮件发送器"""
 
@@ -28,18 +100,35 @@ class EmailSender:
         self.config = config
         self.smtp = None
         self.imap = None
+        self.tls_key = (config.get('smtp_server'), config.get('smtp_port'))
 
     def connect_smtp(self):
-        """连接 SMTP 服务器"""
+        """连接 SMTP 服务器
+
+        465 端口使用 SSL，587 端口使用 STARTTLS，25 端口为明文。
+        TLS 连接共用全局 SSLContext 并尝试复用上次的会话
+        """
         try:
             logger.info(f"正在连接 SMTP 服务器: {self.config['smtp_server']}:{self.config['smtp_port']}")
 
+            context = tls_session_cache.context_for(self.tls_key)
+
             if self.config['smtp_port'] == 465:
                 self.smtp = smtplib.SMTP_SSL(
+                    self.config['smtp_server'],
+                    self.config['smtp_port'],
+                    timeout=30,
+                    context=context
+                )
+            elif self.config['smtp_port'] == 587:
+                self.smtp = smtplib.SMTP(
                     self.config['smtp_server'],
                     self.config['smtp_port'],
                     timeout=30
                 )
+                self.smtp.ehlo()
+                self.smtp.starttls(context=context)
+                self.smtp.ehlo()
             elif self.config['smtp_port'] == 25:
                 self.smtp = smtplib.SMTP(
                     self.config['smtp_server'],
@@ -51,9 +140,19 @@ class EmailSender:
 
             # 登录
             self.smtp.login(self.config['sender_email'], self.config['password'])
+
+            # 登录后服务器已下发会话票据，保存以便重连复用
+            tls_session_cache.save_session(self.tls_key, self.smtp.sock)
             logger.info("SMTP 连接成功")
             return True
 
+        except ssl.SSLCertVerificationError as e:
+            # TLS 连接会校验服务器证书和主机名
+            message = (f"SMTP 服务器 {self.config['smtp_server']} 的证书验证失败：{e.verify_message or e}\n"
+                       "服务器使用自签名证书或证书与服务器地址不匹配时无法连接，"
+                       "请确认 SMTP 服务器地址与证书中的域名一致，或联系邮件服务商")
+            logger.error(message)
+            raise CertificateError(message) from e
         except Exception as e:
             logger.error(f"SMTP 连接失败: {e}")
             raise
@@ -85,60 +184,70 @@ class EmailSender:
         Args:
             to_email: 收件人邮箱
             subject: 邮件主题
-            html_content: HTML 格式的邮件内容
+            html_content: HTML 格式的邮件内容（字符串，或 render_to_html 返回的 UTF-8 字节串）
             sender_name: 发件人名称
 
         Returns:
             发送结果 (True/False)
         """
-        try:
-            # 创建邮件
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = formataddr([
-                sender_name or self.config['sender_name'],
-                self.config['sender_email']
-            ])
-            msg['To'] = to_email
-
-            # 添加 HTML 内容
+        # 创建邮件
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = formataddr([
+            sender_name or self.config['sender_name'],
+            self.config['sender_email']
+        ])
+        msg['To'] = to_email
+
+        # 添加 HTML 内容
+        if isinstance(html_content, bytes):
+            # 已是 UTF-8 字节串，直接 base64 编码，不再解码成字符串
+            html_part = MIMENonMultipart('text', 'html', charset='utf-8')
+            html_part.set_payload(html_content)
+            encoders.encode_base64(html_part)
+        else:
             html_part = MIMEText(html_content, 'html', 'utf-8')
-            msg.attach(html_part)
-
-            # 发送邮件
-            self.smtp.sendmail(
-                self.config['sender_email'],
-                [to_email],
-                msg.as_string()
-            )
-
-            logger.info(f"邮件发送成功: {to_email}")
-            return True
+        msg.attach(html_part)
 
-        except Exception as e:
-            logger.error(f"邮件发送失败 {to_email}: {e}")
-            # 重试一次
+        try:
             try:
-                time.sleep(1)
                 self.smtp.sendmail(
                     self.config['sender_email'],
                     [to_email],
                     msg.as_string()
                 )
-                logger.info(f"邮件重试发送成功: {to_email}")
-                return True
-            except Exception as retry_error:
-                logger.error(f"邮件重试发送失败 {to_email}: {retry_error}")
-                return False
+            except smtplib.SMTPServerDisconnected:
+                # 连接断开属于连接问题，立即重连（复用 TLS 会话）后再发一次
+                logger.warning(f"SMTP 连接已断开，正在重连: {to_email}")
+                self.connect_smtp()
+                self.smtp.sendmail(
+                    self.config['sender_email'],
+                    [to_email],
+                    msg.as_string()
+                )
 
-    def disconnect(self):
-        """断开连接"""
+            logger.info(f"邮件发送成功: {to_email}")
+            return True
+
+        except Exception as e:
+            # 失败不在此处等待重试，由 EmailBatchSender 放入重试队列
+            logger.error(f"邮件发送失败 {to_email}: {e}")
+            return False
+
+    def disconnect_smtp(self):
+        """断开 SMTP 连接"""
         try:
             if self.smtp:
+                tls_session_cache.save_session(self.tls_key, self.smtp.sock)
                 self.smtp.quit()
                 logger.info("SMTP 连接已断开")
         except:
             pass
+        self.smtp = None
+
+    def disconnect(self):
+        """断开连接"""
+        self.disconnect_smtp()
 
         try:
             if self.imap:
@@ -151,6 +260,13 @@ class EmailSender:
 class EmailBatchSender:
     """批量邮件发送器"""
 
+    # 定时发送等待超过该秒数时先断开 SMTP 连接
+    IDLE_DISCONNECT_SECONDS = 60
+
+    # 默认最多发送次数（含首次）和重试退避基数（秒）
+    DEFAULT_MAX_ATTEMPTS = 3
+    DEFAULT_RETRY_BACKOFF = 5
+
     def __init__(self, config, progress_callback=None):
         """初始化批量发送器
 
@@ -164,14 +280,19 @@ class EmailBatchSender:
         self.is_running = False
         self.is_paused = False
         self.results = []
+        self.finished_count = 0
 
     def send_batch(self, employee_list, subject_template, template_handler, template_config):
         """批量发送邮件
 
+        失败的邮件不会原地重试，而是放入重试队列并按退避时间排队，
+        主流程继续发送后面的员工，到期的重试穿插在主流程中执行，
+        主流程结束后再处理剩余的重试
+
         Args:
-            employee_list: 员工数据列表
+            employee_list: 员工数据列表，也可以是流式模式的 ExcelReader（边读边发）
             subject_template: 邮件主题模板，如 "{name}的工资明细"
-            template_handler: 模板处理器
+            template_handler: 模板处理器（TemplateHandler 或 TemplateRegistry）
             template_config: 模板配置
 
         Returns:
@@ -179,6 +300,7 @@ class EmailBatchSender:
         """
         self.is_running = True
         self.results = []
+        self.finished_count = 0
 
         try:
             # 连接服务器
@@ -188,62 +310,40 @@ class EmailBatchSender:
             total = len(employee_list)
             logger.info(f"开始批量发送邮件，共 {total} 封")
 
-            for idx, employee in enumerate(employee_list):
-                if not self.is_running:
-                    logger.info("发送已停止")
-                    break
+            retry_queue = []  # 堆: (重试时间, 序号, 员工, 已尝试次数)
+            send_args = (subject_template, template_handler, template_config)
 
-                while self.is_paused:
-                    time.sleep(0.5)
-                    if not self.is_running:
+            # 邮件内容由多个进程提前批量渲染，发送时直接取用；重试时重新渲染
+            rendered = template_handler.render_many(employee_list, template_config)
+            try:
+                for idx, (employee, html_content) in enumerate(rendered):
+                    if not self._wait_if_paused():
+                        logger.info("发送已停止")
                         break
 
-                try:
-                    # 生成邮件主题
-                    subject = subject_template.format(
-                        name=employee.get('name', ''),
-                        pay_month=employee.get('pay_month', '')
-                    )
-
-                    # 生成邮件内容
-                    html_content = template_handler.render_to_html(employee, template_config)
-
-                    # 发送邮件
-                    success = self.sender.send_email(
-                        to_email=employee['email'],
-                        subject=subject,
-                        html_content=html_content,
-                        sender_name=self.config.get('sender_name')
-                    )
-
-                    # 记录结果
-                    result = {
-                        'name': employee.get('name'),
-                        'email': employee['email'],
-                        'success': success,
-                        'message': '成功' if success else '失败'
-                    }
-                    self.results.append(result)
-
-                    # 更新进度
-                    if self.progress_callback:
-                        self.progress_callback(idx + 1, total, result)
-
-                    # 发送间隔
-                    time.sleep(self.config.get('send_interval', 1))
-
-                except Exception as e:
-                    logger.error(f"发送邮件失败 {employee.get('name')}: {e}")
-                    result = {
-                        'name': employee.get('name'),
-                        'email': employee['email'],
-                        'success': False,
-                        'message': str(e)
-                    }
-                    self.results.append(result)
-
-                    if self.progress_callback:
-                        self.progress_callback(idx + 1, total, result)
+                    # 先处理已到期的重试
+                    while retry_queue and retry_queue[0][0] <= datetime.now() and self.is_running:
+                        _, retry_idx, retry_employee, attempts = heapq.heappop(retry_queue)
+                        self._attempt(retry_idx, retry_employee, attempts + 1, retry_queue, total, *send_args)
+
+                    self.results.append(None)
+                    self._attempt(idx, employee, 1, retry_queue, total, *send_args, html_content=html_content)
+            finally:
+                rendered.close()
+
+            # 主流程结束后处理剩余的重试
+            while retry_queue and self.is_running:
+                retry_at, retry_idx, retry_employee, attempts = retry_queue[0]
+                if not self._sleep_until(retry_at) or not self._wait_if_paused():
+                    break
+                heapq.heappop(retry_queue)
+                self._attempt(retry_idx, retry_employee, attempts + 1, retry_queue, total, *send_args)
+
+            if retry_queue:
+                logger.info(f"发送已停止，{len(retry_queue)} 封邮件未完成重试")
+                for _, retry_idx, _, _ in retry_queue:
+                    self.results[retry_idx]['retry_pending'] = False
+            self.results = [r for r in self.results if r is not None]
 
             logger.info(f"批量发送完成，成功 {sum(1 for r in self.results if r['success'])} 封")
 
@@ -256,6 +356,177 @@ class EmailBatchSender:
 
         return self.results
 
+    def send_scheduled(self, job, queue, template_handler):
+        """按计划发送定时任务
+
+        在允许的时间段内按每日额度均匀发送，每发送一封即保存队列，
+        中途停止或程序退出后可从剩余部分继续
+
+        Args:
+            job: ScheduledJob
+            queue: SendQueue
+            template_handler: 模板处理器（TemplateHandler 或 TemplateRegistry）
+
+        Returns:
+            该任务的全部发送结果
+        """
+        self.is_running = True
+        self.results = job.results
+        connected = False
+
+        try:
+            # 从队列文件恢复的任务先重新读取员工数据
+            if not job.resolved:
+                job.resolve()
+                queue.save()
+
+            self.sender.connect_imap()
+            total = len(job.results) + len(job.pending)
+            logger.info(f"开始定时发送任务 {job.job_id}，剩余 {len(job.pending)} 封")
+
+            while job.pending:
+                send_at = job.next_send_time(datetime.now())
+                wait_seconds = (send_at - datetime.now()).total_seconds()
+                if wait_seconds > 0:
+                    logger.info(f"下一封邮件将于 {send_at.strftime('%Y-%m-%d %H:%M:%S')} 发送")
+                    # 长时间等待时断开连接，避免服务器超时
+                    if connected and wait_seconds > self.IDLE_DISCONNECT_SECONDS:
+                        self.sender.disconnect_smtp()
+                        connected = False
+                    if not self._sleep_until(send_at):
+                        logger.info("发送已停止")
+                        break
+
+                if not self._wait_if_paused():
+                    logger.info("发送已停止")
+                    break
+
+                if not connected:
+                    self.sender.connect_smtp()
+                    connected = True
+
+                employee = job.pending[0]
+                result = self._send_one(employee, job.subject_template, template_handler, job.template_config)
+                result['attempts'] = 1
+                job.record(result, datetime.now())
+                queue.save()
+
+                if self.progress_callback:
+                    self.progress_callback(len(job.results), total, result)
+
+                time.sleep(self.config.get('send_interval', 1))
+
+            logger.info(f"定时发送任务 {job.job_id} 结束，剩余 {len(job.pending)} 封")
+
+        except Exception as e:
+            logger.error(f"定时发送失败: {e}")
+            raise
+        finally:
+            queue.save()
+            self.sender.disconnect()
+            self.is_running = False
+
+        return self.results
+
+    def _attempt(self, idx, employee, attempts, retry_queue, total,
+                 subject_template, template_handler, template_config, html_content=None):
+        """发送一次并记录结果，失败且未超过次数时放入重试队列
+
+        Args:
+            idx: 员工在本批次中的序号
+            employee: 员工数据
+            attempts: 本次是第几次发送
+            retry_queue: 重试队列（堆）
+            total: 本批次总数
+            html_content: 已渲染的邮件内容（None 时现场渲染）
+        """
+        result = self._send_one(employee, subject_template, template_handler, template_config, html_content)
+        result['attempts'] = attempts
+        result['retry_pending'] = False
+
+        max_attempts = self.config.get('max_attempts', self.DEFAULT_MAX_ATTEMPTS)
+        if not result['success'] and attempts < max_attempts:
+            backoff = self.config.get('retry_backoff', self.DEFAULT_RETRY_BACKOFF) * (2 ** (attempts - 1))
+            retry_at = datetime.now() + timedelta(seconds=backoff)
+            heapq.heappush(retry_queue, (retry_at, idx, employee, attempts))
+            result['retry_pending'] = True
+            result['message'] = f"{result['message']}，{backoff} 秒后重试"
+            logger.info(f"{employee.get('name')} 第 {attempts} 次发送失败，{backoff} 秒后重试")
+
+        self.results[idx] = result
+        if not result['retry_pending']:
+            self.finished_count += 1
+
+        # 更新进度（已确定最终结果的数量）
+        if self.progress_callback:
+            self.progress_callback(self.finished_count, total, result)
+
+        # 发送间隔
+        time.sleep(self.config.get('send_interval', 1))
+
+    def _send_one(self, employee, subject_template, template_handler, template_config, html_content=None):
+        """发送单个员工的工资条
+
+        Args:
+            html_content: 已渲染的邮件内容，None 时现场渲染；批量渲染失败时为异常对象
+
+        Returns:
+            发送结果字典
+        """
+        try:
+            # 生成邮件主题
+            subject = subject_template.format(
+                name=employee.get('name', ''),
+                pay_month=employee.get('pay_month', '')
+            )
+
+            # 生成邮件内容
+            if isinstance(html_content, Exception):
+                raise html_content
+            if html_content is None:
+                html_content = template_handler.render_to_html(employee, template_config)
+
+            # 发送邮件
+            success = self.sender.send_email(
+                to_email=employee['email'],
+                subject=subject,
+                html_content=html_content,
+                sender_name=self.config.get('sender_name')
+            )
+
+            return {
+                'row_id': employee.get('_row_id'),
+                'name': employee.get('name'),
+                'email': employee['email'],
+                'success': success,
+                'message': '成功' if success else '失败'
+            }
+
+        except Exception as e:
+            logger.error(f"发送邮件失败 {employee.get('name')}: {e}")
+            return {
+                'row_id': employee.get('_row_id'),
+                'name': employee.get('name'),
+                'email': employee['email'],
+                'success': False,
+                'message': str(e)
+            }
+
+    def _wait_if_paused(self):
+        """暂停时等待，返回是否继续发送"""
+        while self.is_paused and self.is_running:
+            time.sleep(0.5)
+        return self.is_running
+
+    def _sleep_until(self, moment):
+        """等待到指定时间，期间可被停止，返回是否继续发送"""
+        while self.is_running:
+            remaining = (moment - datetime.now()).total_seconds()
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, 1))
+        return False
+
     def stop(self):
         """停止发送"""
         self.is_running = False
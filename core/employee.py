@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+员工记录模块
+
+使用 __slots__ 的紧凑记录代替每行一个字典：已知字段保存为属性，
+未知列放在溢出字典中。记录同时支持字典式读写，便于模板和发送模块直接使用。
+display 保存预先生成的金额显示字符串（不属于数据字段，不出现在 keys() 中）
+"""
+
+from core.money import MONEY_INDEX
+
+
+_MISSING = object()
+
+
+class _Absent:
+    """序列化状态中表示“字段未设置”的占位值（pickle 时按模块全局名引用）"""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        return '_ABSENT'
+
+    def __repr__(self):
+        return '_ABSENT'
+
+
+_ABSENT = _Absent()
+
+
+class EmployeeRecord:
+    """员工记录基类，具体字段由 create_employee_type 生成"""
+
+    __slots__ = ('extra', 'display')
+
+    # 已知字段名（由 create_employee_type 填充）
+    FIELDS = ()
+    _FIELD_SET = frozenset()
+
+    def __init__(self, values=None):
+        """初始化员工记录
+
+        Args:
+            values: 字段名 -> 值 的字典
+        """
+        self.extra = None
+        self.display = None
+        if values:
+            for key, value in values.items():
+                self[key] = value
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if self.display is not None and key in MONEY_INDEX:
+            # 金额被修改后预生成的显示字符串失效
+            self.display = None
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def get(self, key, default=None):
+        if key in self._FIELD_SET:
+            return getattr(self, key, default)
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self):
+        keys = [field for field in self.FIELDS if hasattr(self, field)]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (EmployeeRecord, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def to_dict(self):
+        """转换为普通字典"""
+        return dict(self.items())
+
+    def copy(self):
+        return self.to_dict()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+    def __getstate__(self):
+        """序列化状态：(按 FIELDS 排列的值元组, 溢出字典, 金额显示字符串)
+
+        值按位置保存、不带字段名，反序列化时直接赋给 slots，不逐个字段调用 __setitem__
+        """
+        return tuple([getattr(self, field, _ABSENT) for field in self.FIELDS]), self.extra, self.display
+
+    def __setstate__(self, state):
+        # 由 create_employee_type 为每个记录类型生成按位置赋值的版本；这里是通用实现
+        values, self.extra, self.display = state
+        for field, value in zip(self.FIELDS, values):
+            if value is not _ABSENT:
+                setattr(self, field, value)
+
+
+def create_employee_type(fields, name='Employee', module=None):
+    """根据字段列表生成带 __slots__ 的员工记录类型
+
+    Args:
+        fields: 已知字段名列表（如 ExcelReader.FIELD_MAPPING 的值）
+        name: 类名
+        module: 类所在模块名（用于 pickle 查找）
+
+    Returns:
+        EmployeeRecord 的子类
+    """
+    fields = tuple(dict.fromkeys(fields))
+    namespace = {
+        '__slots__': fields,
+        'FIELDS': fields,
+        '_FIELD_SET': frozenset(fields),
+        '__doc__': "员工记录",
+    }
+    if fields and all(field.isidentifier() for field in fields):
+        namespace['__setstate__'] = _compile_setstate(fields)
+    if module:
+        namespace['__module__'] = module
+    return type(name, (EmployeeRecord,), namespace)
+
+
+def _compile_setstate(fields):
+    """生成按位置一次性给全部 slots 赋值的 __setstate__
+
+    缓存命中时每条记录都要反序列化，解包赋值比逐个字段 setattr 快得多；
+    个别字段未设置（短行）时再删除对应属性
+    """
+    targets = ', '.join(f"self.{field}" for field in fields)
+    source = (
+        "def __setstate__(self, state):\n"
+        "    values, self.extra, self.display = state\n"
+        f"    ({targets},) = values\n"
+        "    if _ABSENT in values:\n"
+        "        for field, value in zip(self.FIELDS, values):\n"
+        "            if value is _ABSENT:\n"
+        "                delattr(self, field)\n"
+    )
+    namespace = {'_ABSENT': _ABSENT}
+    exec(source, namespace)
+    return namespace['__setstate__']
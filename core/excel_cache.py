@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Excel 解析缓存模块
+
+将解析、规整后的工资数据以 pickle 格式缓存到本地，
+同一文件再次打开时直接读取缓存，无需重新解析 Excel
+"""
+
+import os
+import gc
+import pickle
+import hashlib
+from utils.config import app_path
+from utils.logger import logger
+
+
+class ExcelCache:
+    """Excel 解析结果的磁盘缓存（按总大小淘汰最久未使用的条目）"""
+
+    CACHE_SUFFIX = '.cache'
+
+    def __init__(self, cache_dir=None, max_size_mb=200):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，默认为程序目录下的 cache
+            max_size_mb: 缓存总大小上限（MB）
+        """
+        self.cache_dir = cache_dir or app_path('cache')
+        self.max_size = max_size_mb * 1024 * 1024
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    @staticmethod
+    def make_key(file_path, *versions):
+        """根据文件大小、修改时间、文件内容和版本信息生成缓存键
+
+        Args:
+            file_path: Excel 文件路径
+            versions: 影响解析结果的其他信息（字段映射版本等）
+
+        Returns:
+            十六进制字符串
+        """
+        stat = os.stat(file_path)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        for version in versions:
+            digest.update(str(version).encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + self.CACHE_SUFFIX)
+
+    def get(self, key):
+        """读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存内容，未命中返回 None
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            # 反序列化会一次创建几十万个对象，期间关闭垃圾回收，避免反复扫描这些新对象
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                with open(path, 'rb') as f:
+                    payload = pickle.load(f)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+            # 更新访问时间，用于淘汰排序
+            os.utime(path)
+            logger.info(f"命中 Excel 解析缓存: {key}")
+            return payload
+        except Exception as e:
+            logger.warning(f"读取 Excel 解析缓存失败: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, key, payload):
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            payload: 可 pickle 的缓存内容
+        """
+        path = self._path(key)
+        temp_path = path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+            self._evict()
+        except Exception as e:
+            logger.warning(f"写入 Excel 解析缓存失败: {e}")
+            self._remove(temp_path)
+
+    def _evict(self):
+        """总大小超过上限时删除最久未使用的缓存"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        while total > self.max_size and len(entries) > 1:
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total -= size
+            logger.info(f"淘汰 Excel 解析缓存: {os.path.basename(path)}")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """清空缓存"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.CACHE_SUFFIX):
+                self._remove(os.path.join(self.cache_dir, name))
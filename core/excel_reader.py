@@ -3,15 +3,30 @@
 """
 Excel 读取模块
 
-使用 openpyxl 或 xlrd 读取 Excel 工资条数据
+使用 openpyxl 或 xlrd 读取 Excel 工资条数据，也支持 CSV / TSV 和 Parquet（需安装 pyarrow）
+等导出格式。文件格式按内容识别，不只看扩展名
 """
 
 import os
+import re
+import csv
+import codecs
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
+from itertools import islice
 from openpyxl import load_workbook
 import xlrd
+from core import money
+from core.employee import create_employee_type
+from core.payroll_table import PayrollTable
 from utils.logger import logger
 
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
 
 class ExcelReader:
     """Excel 读取器"""
@@ -39,20 +54,72 @@ class ExcelReader:
         '发放月份': 'pay_month',
     }
 
-    def __init__(self, file_path):
+    # 解析逻辑版本，解析结果的格式变化时递增，使旧缓存失效
+    PARSER_VERSION = 6
+
+    # CSV 中按数字读取的文本：有前导零（如工号 "00123"）或超过 15 位的保留为文本
+    CSV_NUMBER_PATTERN = re.compile(r'-?(?:0|[1-9]\d{0,14})(?:\.\d+)?')
+
+    # 流式读取时每批生成金额显示字符串的行数
+    DISPLAY_CHUNK_SIZE = 1000
+
+    # 文件格式 -> (加载方法, 数据解析方法)，新增格式只需在此登记
+    FORMATS = {
+        'xlsx': ('_load_xlsx', '_parse_data_xlsx'),
+        'xls': ('_load_xls', '_parse_data_xls'),
+        'csv': ('_load_csv', '_parse_data_csv'),
+        'parquet': ('_load_parquet', '_parse_data_parquet'),
+    }
+
+    # 文件头特征
+    XLSX_MAGIC = b'PK\x03\x04'
+    XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+    PARQUET_MAGIC = b'PAR1'
+
+    # 识别 CSV 编码和分隔符时读取的字节数
+    SNIFF_SIZE = 64 * 1024
+
+    # 重新加载比较数据时忽略的内部字段
+    INTERNAL_FIELDS = frozenset(['_row_id', '_source'])
+
+    def __init__(self, file_path, streaming=False, cache=None, sheets=None, workers=None, deferred=False):
         """初始化 Excel 读取器
 
         Args:
-            file_path: Excel 文件路径
+            file_path: Excel 文件路径，也可以是多个文件路径的列表
+            streaming: 流式模式，不一次性读入全部数据，
+                       通过 iter_rows() 逐行读取（.xlsx 使用只读工作表）
+            cache: ExcelCache 实例，非流式模式下缓存解析结果
+            sheets: 要读取的工作表。None 读取第一个（活动）工作表；
+                    工作表名或序号读取指定工作表；列表或 'all' 读取多个工作表
+            workers: 多个文件/工作表并行解析时的进程数，默认为 CPU 核数
+            deferred: 延迟解析，创建时只打开文件、读取表头，
+                      数据由 load_chunks() 分批解析（用于界面后台加载）
         """
         self.file_path = file_path
+        self.streaming = streaming
+        self.cache = cache
+        self.sheets = sheets
+        self.workers = workers
+        self.deferred = deferred and not streaming and not self._is_multi_source()
+        self.sources = []  # 多来源加载时的 [(文件, 工作表), ...]
+        self.duplicate_emails = {}  # {邮箱: [来源描述, ...]}
+        self.index_by_id = {}  # {行 ID: 员工数据}
+        self.index_by_email = {}  # {邮箱(小写): 员工数据}
         self.workbook = None
         self.sheet = None
         self.headers = []
+        self.column_plan = []
         self.data = []
         self.file_type = None
         self.has_pay_month = False  # 是否有发放月份列
         self.default_pay_month = self._get_default_pay_month()
+        self._pending_rows = None  # 延迟解析时尚未读取的数据行
+        self._cache_key = None
+        self._row_estimate = 0  # CSV / Parquet 在流式和延迟模式下的行数估算
+        self._row_count = None  # 流式模式下数出来的行数（工作表没有记录尺寸或已完整读取一遍时）
+        self.csv_encoding = None
+        self.csv_dialect = None
         self._load()
 
     def _get_default_pay_month(self):
@@ -71,51 +138,438 @@ class ExcelReader:
             last_year = today.year
         return f"{last_year}年{last_month:02d}月"
 
+    def _is_multi_source(self):
+        """是否需要读取多个文件或多个工作表"""
+        return isinstance(self.file_path, (list, tuple)) or isinstance(self.sheets, (list, tuple)) or self.sheets == 'all'
+
     def _load(self):
         """加载 Excel 文件"""
+        if self._is_multi_source():
+            self._load_sources()
+            return
+
         try:
             logger.info(f"正在加载 Excel 文件: {self.file_path}")
 
-            # 根据文件扩展名选择读取方式
-            if self.file_path.endswith('.xlsx'):
-                self._load_xlsx()
-            elif self.file_path.endswith('.xls'):
-                self._load_xls()
+            cache_key = None
+            if self.cache and not self.streaming:
+                cache_key = self.cache.make_key(
+                    self.file_path,
+                    self.PARSER_VERSION,
+                    sorted(self.FIELD_MAPPING.items()),
+                    self.default_pay_month,
+                    self.sheets
+                )
+                if self._load_from_cache(cache_key):
+                    logger.info(f"从缓存读取 {len(self.data)} 条员工数据")
+                    return
+
+            # 根据文件内容选择读取方式
+            self.file_type = self.detect_format(self.file_path)
+            getattr(self, self.FORMATS[self.file_type][0])()
+
+            self._cache_key = cache_key
+            if self.streaming:
+                logger.info(f"已打开流式读取，约 {self.get_total_count()} 行数据")
+            elif self.deferred:
+                logger.info(f"已打开文件，约 {self.get_total_count()} 行数据待解析")
+            else:
+                self._fill_money_display(self.data)
+                self._finish_load()
+
+        except Exception as e:
+            logger.error(f"加载 Excel 文件失败: {e}")
+            raise
+
+    def _finish_load(self):
+        """数据读取完成后检查重复邮箱、建立索引并写入缓存"""
+        logger.info(f"成功读取 {len(self.data)} 条员工数据")
+        self._find_duplicate_emails()
+        self._build_indexes()
+
+        if self._cache_key:
+            self.cache.put(self._cache_key, {
+                'file_type': self.file_type,
+                'headers': self.headers,
+                'data': self.data,
+            })
+
+    def load_chunks(self, chunk_size=500):
+        """分批解析数据，每解析完一批就产出，便于界面边读边显示
+
+        以 deferred=True 创建时逐批读取文件；其他情况（已从缓存或多个来源加载完）
+        直接按批产出已有数据。全部产出后数据、索引与普通加载一致；
+        中途停止迭代即放弃加载，此时应调用 close()
+
+        Args:
+            chunk_size: 每批行数
+
+        Yields:
+            本批新解析的员工数据列表
+        """
+        if self._pending_rows is None:
+            for start in range(0, len(self.data), chunk_size):
+                yield self.data[start:start + chunk_size]
+            return
+
+        rows = self._pending_rows
+        display_cache = {}
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            self._fill_money_display(chunk, display_cache)
+            self.data.extend(chunk)
+            yield chunk
+
+        self._pending_rows = None
+        self.close()
+        self._finish_load()
+
+    def _load_from_cache(self, cache_key):
+        """从缓存加载解析结果
+
+        Returns:
+            是否命中缓存
+        """
+        payload = self.cache.get(cache_key)
+        if payload is None:
+            return False
+        self.file_type = payload['file_type']
+        self._set_headers(payload['headers'])
+        self.data = payload['data']
+        self._find_duplicate_emails()
+        self._build_indexes()
+        return True
+
+    def _resolve_sources(self):
+        """展开需要读取的 (文件, 工作表) 列表"""
+        file_paths = self.file_path if isinstance(self.file_path, (list, tuple)) else [self.file_path]
+        sources = []
+        for file_path in file_paths:
+            if self.sheets == 'all':
+                sheet_names = self._list_sheet_names(file_path)
+            elif isinstance(self.sheets, (list, tuple)):
+                sheet_names = list(self.sheets)
             else:
-                raise ValueError(f"不支持的文件格式: {self.file_path}")
+                sheet_names = [self.sheets]
+            sources.extend((file_path, sheet) for sheet in sheet_names)
+        return sources
 
-            logger.info(f"成功读取 {len(self.data)} 条员工数据")
+    @classmethod
+    def detect_format(cls, file_path):
+        """按文件内容识别格式
+
+        xlsx 为 zip 包，xls 为 OLE2 复合文档，Parquet 以 PAR1 开头；
+        其余可按文本解码的文件视为 CSV / TSV
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            'xlsx' / 'xls' / 'csv' / 'parquet'
+        """
+        with open(file_path, 'rb') as f:
+            head = f.read(cls.SNIFF_SIZE)
+        if head.startswith(cls.XLSX_MAGIC):
+            return 'xlsx'
+        if head.startswith(cls.XLS_MAGIC):
+            return 'xls'
+        if head.startswith(cls.PARQUET_MAGIC):
+            return 'parquet'
+        if head and b'\x00' not in head:
+            return 'csv'
+        raise ValueError(f"不支持的文件格式: {file_path}")
+
+    @classmethod
+    def _list_sheet_names(cls, file_path):
+        """获取文件中全部工作表名（CSV / Parquet 只有一张表，返回 [None]）"""
+        file_format = cls.detect_format(file_path)
+        if file_format == 'xlsx':
+            workbook = load_workbook(file_path, read_only=True)
+            names = workbook.sheetnames
+            workbook.close()
+            return names
+        if file_format == 'xls':
+            workbook = xlrd.open_workbook(file_path, on_demand=True)
+            names = workbook.sheet_names()
+            workbook.release_resources()
+            return names
+        return [None]
+
+    def _load_sources(self):
+        """并行加载多个文件/工作表并合并为一份员工列表
+
+        每个来源在独立进程中解析，合并后为每条数据记录来源 (_source)，
+        并检查不同来源之间的重复邮箱
+        """
+        if self.streaming:
+            raise ValueError("流式模式只支持读取单个工作表")
+
+        try:
+            self.sources = self._resolve_sources()
+            logger.info(f"正在并行加载 {len(self.sources)} 个工作表")
+
+            tasks = [(file_path, sheet, self.cache) for file_path, sheet in self.sources]
+            if len(tasks) == 1:
+                results = [_parse_source(tasks[0])]
+            else:
+                max_workers = min(self.workers or os.cpu_count() or 1, len(tasks))
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    results = list(executor.map(_parse_source, tasks))
+
+            headers = []
+            file_types = set()
+            for source_idx, ((file_path, sheet), (file_type, source_headers, data)) in enumerate(zip(self.sources, results), start=1):
+                source = os.path.basename(file_path)
+                if sheet is not None:
+                    source += f"[{sheet}]"
+                for employee_data in data:
+                    employee_data['_source'] = source
+                    # 行 ID 加上来源序号，保证多来源之间不重复
+                    employee_data['_row_id'] = f"{source_idx}-{employee_data['_row_id']}"
+                self.data.extend(data)
+                file_types.add(file_type)
+                headers.extend(h for h in source_headers if h not in headers)
+
+            self.file_type = file_types.pop() if len(file_types) == 1 else 'mixed'
+            self._set_headers(headers)
+            self._find_duplicate_emails()
+            self._build_indexes()
+            logger.info(f"成功读取 {len(self.data)} 条员工数据（{len(self.sources)} 个来源）")
 
         except Exception as e:
             logger.error(f"加载 Excel 文件失败: {e}")
             raise
 
+    def _build_indexes(self):
+        """建立 行 ID -> 员工 和 邮箱 -> 员工 的索引（邮箱重复时指向第一条）"""
+        self.index_by_id = {employee_data['_row_id']: employee_data for employee_data in self.data}
+        index_by_email = {}
+        for employee_data in self.data:
+            email = str(employee_data.get('email', '')).strip().lower()
+            index_by_email.setdefault(email, employee_data)
+        self.index_by_email = index_by_email
+
+    def diff(self, other, key=None):
+        """与重新读取的数据逐行比较（不修改任何一方）
+
+        Args:
+            other: 重新读取同一文件得到的 ExcelReader
+            key: 'email' 按邮箱匹配，'row_id' 按行 ID 匹配；
+                 默认两边都没有重复邮箱时按邮箱匹配，否则按行 ID
+
+        Returns:
+            {'key': 匹配方式, 'added': [新记录], 'removed': [旧记录],
+             'changed': [(旧记录, 新记录, [变化的字段, ...]), ...]}
+        """
+        if key is None:
+            key = 'row_id' if self.duplicate_emails or other.duplicate_emails else 'email'
+        if key == 'email':
+            old_index, new_index = self.index_by_email, other.index_by_email
+        else:
+            old_index, new_index = self.index_by_id, other.index_by_id
+
+        added = []
+        changed = []
+        internal = self.INTERNAL_FIELDS
+        for match_key, new_record in new_index.items():
+            old_record = old_index.get(match_key)
+            if old_record is None:
+                added.append(new_record)
+                continue
+            fields = dict.fromkeys(old_record.keys())
+            fields.update(dict.fromkeys(new_record.keys()))
+            changed_fields = [field for field in fields
+                              if field not in internal and old_record.get(field) != new_record.get(field)]
+            if changed_fields:
+                changed.append((old_record, new_record, changed_fields))
+        removed = [record for match_key, record in old_index.items() if match_key not in new_index]
+
+        logger.info(f"重新加载比较完成（按{'邮箱' if key == 'email' else '行 ID'}）: "
+                    f"新增 {len(added)}，删除 {len(removed)}，修改 {len(changed)}")
+        return {'key': key, 'added': added, 'removed': removed, 'changed': changed}
+
+    def apply_diff(self, diff):
+        """把 diff() 的结果应用到当前数据
+
+        修改的记录原地更新（保留原行 ID，界面上的行和发送状态不受影响），
+        删除的记录从数据和索引中移除，新增的记录追加到末尾。
+        data 列表对象本身保持不变
+
+        Args:
+            diff: diff() 的返回值
+        """
+        removed = diff['removed']
+        if removed:
+            removed_ids = {id(record) for record in removed}
+            self.data[:] = [record for record in self.data if id(record) not in removed_ids]
+            for record in removed:
+                self.index_by_id.pop(record['_row_id'], None)
+                self._unindex_email(record)
+
+        for old_record, new_record, fields in diff['changed']:
+            if 'email' in fields:
+                self._unindex_email(old_record)
+            for field in fields:
+                old_record[field] = new_record.get(field, '')
+            old_record.display = new_record.display
+            if 'email' in fields:
+                self.index_by_email.setdefault(str(old_record.get('email', '')).strip().lower(), old_record)
+
+        for record in diff['added']:
+            # 新记录的行 ID 可能与保留下来的旧记录重复，加后缀区分
+            row_id = base_id = record['_row_id']
+            suffix = 1
+            while row_id in self.index_by_id:
+                suffix += 1
+                row_id = f"{base_id}.{suffix}"
+            record['_row_id'] = row_id
+            self.data.append(record)
+            self.index_by_id[row_id] = record
+            self.index_by_email.setdefault(str(record.get('email', '')).strip().lower(), record)
+
+        self._find_duplicate_emails()
+
+    def _unindex_email(self, record):
+        """从邮箱索引中移除指向该记录的条目"""
+        email = str(record.get('email', '')).strip().lower()
+        if self.index_by_email.get(email) is record:
+            del self.index_by_email[email]
+
+    def _find_duplicate_emails(self):
+        """检查重复邮箱（忽略大小写和首尾空格）"""
+        seen = {}
+        for employee_data in self.data:
+            email = str(employee_data.get('email', '')).strip().lower()
+            label = employee_data.get('name', '')
+            if employee_data.get('_source'):
+                label = f"{label} ({employee_data['_source']})"
+            seen.setdefault(email, []).append(label)
+
+        self.duplicate_emails = {email: labels for email, labels in seen.items() if len(labels) > 1}
+        if self.duplicate_emails:
+            # 只记一行汇总，明细见 duplicate_emails 和数据校验报告
+            rows = sum(len(labels) for labels in self.duplicate_emails.values())
+            logger.warning(f"发现 {len(self.duplicate_emails)} 个重复邮箱，涉及 {rows} 行")
+
     def _load_xlsx(self):
         """加载 .xlsx 文件（使用 openpyxl）"""
-        self.file_type = 'xlsx'
-        self.workbook = load_workbook(self.file_path, data_only=True)
-        self.sheet = self.workbook.active
+        self.workbook = load_workbook(self.file_path, data_only=True, read_only=self.streaming or self.deferred)
+        if self.sheets is None:
+            self.sheet = self.workbook.active
+        elif isinstance(self.sheets, int):
+            self.sheet = self.workbook.worksheets[self.sheets]
+        else:
+            self.sheet = self.workbook[self.sheets]
 
         # 读取表头
-        self.headers = [cell.value for cell in self.sheet[1]]
-        logger.info(f"表头: {self.headers}")
-
-        # 检查是否有发放月份列
-        self.has_pay_month = '发放月份' in self.headers
-        if not self.has_pay_month:
-            logger.info(f"Excel 中没有'发放月份'列，将自动添加默认值: {self.default_pay_month}")
+        header_row = next(self.sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        self._set_headers(list(header_row))
 
-        # 读取数据
-        self.data = self._parse_data_xlsx()
+        # 流式模式下不预先读取数据，延迟模式下由 load_chunks() 分批读取
+        if self.deferred:
+            self._pending_rows = self._parse_data_xlsx()
+        elif not self.streaming:
+            self.data = list(self._parse_data_xlsx())
 
     def _load_xls(self):
-        """加载 .xls 文件（使用 xlrd）"""
-        self.file_type = 'xls'
-        self.workbook = xlrd.open_workbook(self.file_path)
-        self.sheet = self.workbook.sheet_by_index(0)
+        """加载 .xls 文件（使用 xlrd）
+
+        通过内存映射读取文件并按需加载工作表（on_demand），只解析要读取的那一张，
+        内存占用与单张工作表相当；数据读取完后立即释放工作表和文件映射
+        """
+        self.workbook = xlrd.open_workbook(self.file_path, on_demand=True, use_mmap=True)
+        if self.sheets is None:
+            self.sheet = self.workbook.sheet_by_index(0)
+        elif isinstance(self.sheets, int):
+            self.sheet = self.workbook.sheet_by_index(self.sheets)
+        else:
+            self.sheet = self.workbook.sheet_by_name(self.sheets)
 
         # 读取表头
-        self.headers = [self.sheet.cell_value(0, col) for col in range(self.sheet.ncols)]
+        self._set_headers([self.sheet.cell_value(0, col) for col in range(self.sheet.ncols)])
+
+        # 流式模式下不预先读取数据，延迟模式下由 load_chunks() 分批读取
+        if self.deferred:
+            self._pending_rows = self._parse_data_xls()
+        elif not self.streaming:
+            self.data = list(self._parse_data_xls())
+            self._release_xls()
+
+    def _release_xls(self):
+        """释放 xls 工作表和文件映射"""
+        if self.workbook is not None:
+            self.workbook.release_resources()
+            self.workbook = None
+        self.sheet = None
+
+    def _load_csv(self):
+        """加载 CSV / TSV 文件（使用标准库 csv）
+
+        编码依次尝试 UTF-8（含 BOM）和 GBK，分隔符由 csv.Sniffer 从文件开头识别
+        """
+        if self.sheets not in (None, 0):
+            logger.info(f"CSV 文件只有一张表，忽略工作表参数: {self.sheets}")
+
+        with open(self.file_path, 'rb') as f:
+            sample = f.read(self.SNIFF_SIZE)
+            at_end = not f.read(1)
+
+        for encoding in ('utf-8-sig', 'gbk'):
+            try:
+                text = codecs.getincrementaldecoder(encoding)().decode(sample, final=at_end)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            raise ValueError(f"无法识别 CSV 文件编码: {self.file_path}")
+        self.csv_encoding = encoding
+
+        try:
+            self.csv_dialect = csv.Sniffer().sniff(text, delimiters=',\t;|')
+        except csv.Error:
+            self.csv_dialect = csv.excel
+
+        # 按样本的平均行长估算行数（用于流式/延迟模式的进度显示）
+        lines = text.count('\n')
+        if at_end:
+            self._row_estimate = max(lines - 1, 0)
+        elif lines:
+            self._row_estimate = max(int(os.path.getsize(self.file_path) / (len(sample) / lines)) - 1, 0)
+
+        with open(self.file_path, newline='', encoding=self.csv_encoding) as f:
+            header_row = next(csv.reader(f, self.csv_dialect), [])
+        self._set_headers([header.strip() for header in header_row])
+
+        # 流式模式下不预先读取数据，延迟模式下由 load_chunks() 分批读取
+        if self.deferred:
+            self._pending_rows = self._parse_data_csv()
+        elif not self.streaming:
+            self.data = list(self._parse_data_csv())
+
+    def _load_parquet(self):
+        """加载 Parquet 文件（需安装 pyarrow）"""
+        if not PARQUET_AVAILABLE:
+            raise ValueError("读取 Parquet 文件需要安装 pyarrow")
+
+        parquet_file = pq.ParquetFile(self.file_path)
+        self._row_estimate = parquet_file.metadata.num_rows
+        self._set_headers(list(parquet_file.schema_arrow.names))
+
+        # 流式模式下不预先读取数据，延迟模式下由 load_chunks() 分批读取
+        if self.deferred:
+            self._pending_rows = self._parse_data_parquet()
+        elif not self.streaming:
+            self.data = list(self._parse_data_parquet())
+
+    def _set_headers(self, headers):
+        """设置表头并编译列计划
+
+        Args:
+            headers: 表头行的值列表
+        """
+        self.headers = headers
         logger.info(f"表头: {self.headers}")
 
         # 检查是否有发放月份列
@@ -123,91 +577,187 @@ class ExcelReader:
         if not self.has_pay_month:
             logger.info(f"Excel 中没有'发放月份'列，将自动添加默认值: {self.default_pay_month}")
 
-        # 读取数据
-        self.data = self._parse_data_xls()
+        self.column_plan = self._compile_column_plan(self.headers)
 
-    def _parse_data_xlsx(self):
-        """解析 xlsx 数据"""
-        data_list = []
+    def _compile_column_plan(self, headers):
+        """将表头编译为列计划
+
+        每列只查一次 FIELD_MAPPING，解析时不再逐个单元格查表。
+        表头为空的列直接丢弃；不在映射中的列保留原表头作为字段名。
+        CSV 的单元格都是文本，非金额列先把数字文本转为数字，与 xls / xlsx 的结果一致
+
+        Args:
+            headers: 表头列表
+
+        Returns:
+            [(列序号, 字段名, 转换函数), ...]
+        """
+        plan = []
+        convert_value = self._convert_csv_value if self.file_type == 'csv' else self._convert_value
+        for col_idx, header in enumerate(headers):
+            if header is None or header == '':
+                continue
+            field_name = self.FIELD_MAPPING.get(header, header)
+            convert = money.to_cents if field_name in money.MONEY_INDEX else convert_value
+            plan.append((col_idx, field_name, convert))
+        return plan
 
-        for row_idx, row in enumerate(self.sheet.iter_rows(min_row=2, values_only=True), start=2):
+    @staticmethod
+    def _convert_value(value):
+        """转换单元格值：数字保留两位小数（整数去掉 .0），空值转为 0 或空字符串
+
+        金额列不经过这里，由 money.to_cents 转换为分
+        """
+        # 处理数字格式
+        if isinstance(value, (int, float)):
+            if not value:
+                return 0
+            value = round(value, 2)
+            return int(value) if value == int(value) else value
+        return value if value else ''
+
+    @classmethod
+    def _convert_csv_value(cls, value):
+        """转换 CSV 单元格：数字文本（如出勤天数 "23"）先转为数字，再按 _convert_value 处理"""
+        text = value.strip()
+        if cls.CSV_NUMBER_PATTERN.fullmatch(text):
+            value = float(text) if '.' in text else int(text)
+        return cls._convert_value(value)
+
+    @staticmethod
+    def _fill_money_display(records, cache=None):
+        """按列批量生成金额显示字符串，保存到每条记录的 display
+
+        相同金额只格式化一次，渲染时直接取用，不再逐封邮件格式化
+
+        Args:
+            records: Employee 记录列表
+            cache: 金额 -> 显示字符串 的缓存字典（流式读取时跨批次共用）
+        """
+        if cache is None:
+            cache = {}
+        columns = [money.format_column([record.get(field, 0) for record in records], cache)
+                   for field in money.MONEY_FIELDS]
+        for record, display in zip(records, zip(*columns)):
+            record.display = display
+
+    def _iter_with_display(self, rows):
+        """流式读取时分批生成金额显示字符串，读完一遍后记下准确的员工数"""
+        cache = {}
+        count = 0
+        while True:
+            chunk = list(islice(rows, self.DISPLAY_CHUNK_SIZE))
+            if not chunk:
+                self._row_count = count
+                return
+            self._fill_money_display(chunk, cache)
+            count += len(chunk)
+            yield from chunk
+
+    def _parse_rows(self, rows):
+        """按列计划解析数据行（xlsx / xls 共用）
+
+        Args:
+            rows: 数据行的值序列，第一项对应 Excel 第 2 行
+
+        Yields:
+            Employee 记录，_row_id 为 Excel 行号（字符串），作为稳定的行 ID
+        """
+        plan = self.column_plan
+        plan_width = plan[-1][0] + 1 if plan else 0
+        default_pay_month = self.default_pay_month
+
+        for row_number, row in enumerate(rows, start=2):
             # 跳过空行
             if not any(row):
                 continue
 
-            employee_data = {}
-            for col_idx, value in enumerate(row):
-                if col_idx < len(self.headers):
-                    header = self.headers[col_idx]
-                    field_name = self.FIELD_MAPPING.get(header, header)
-
-                    # 处理数字格式
-                    if isinstance(value, (int, float)):
-                        employee_data[field_name] = round(value, 2) if value else 0
-                    else:
-                        employee_data[field_name] = value if value else ''
-
-            # 如果没有发放月份列，自动添加默认值
-            if not self.has_pay_month:
-                employee_data['pay_month'] = self.default_pay_month
-            # 如果有发放月份列为空，也使用默认值
-            elif not employee_data.get('pay_month'):
-                employee_data['pay_month'] = self.default_pay_month
+            if len(row) >= plan_width:
+                employee_data = Employee({field: convert(row[idx]) for idx, field, convert in plan})
+            else:
+                # 只读模式下行可能比表头短
+                width = len(row)
+                employee_data = Employee({field: convert(row[idx]) for idx, field, convert in plan if idx < width})
+
+            # 没有发放月份列或该列为空时使用默认值
+            if not employee_data.get('pay_month'):
+                employee_data['pay_month'] = default_pay_month
 
             # 验证必填字段
             if not employee_data.get('name') or not employee_data.get('email'):
-                logger.warning(f"第 {row_idx} 行数据不完整，跳过")
+                logger.warning(f"第 {row_number} 行数据不完整，跳过")
                 continue
 
-            data_list.append(employee_data)
+            employee_data['_row_id'] = str(row_number)
+
+            yield employee_data
 
-        return data_list
+    def _parse_data_xlsx(self):
+        """解析 xlsx 数据（生成器，逐行产出员工数据）"""
+        return self._parse_rows(self.sheet.iter_rows(min_row=2, values_only=True))
 
     def _parse_data_xls(self):
-        """解析 xls 数据"""
-        data_list = []
+        """解析 xls 数据（生成器，逐行产出员工数据）"""
+        sheet = self.sheet
+        return self._parse_rows(sheet.row_values(row_idx) for row_idx in range(1, sheet.nrows))
+
+    def _parse_data_csv(self):
+        """解析 CSV 数据（生成器，每次调用重新打开文件）"""
+        def rows():
+            with open(self.file_path, newline='', encoding=self.csv_encoding) as f:
+                reader = csv.reader(f, self.csv_dialect)
+                next(reader, None)
+                yield from reader
+        return self._parse_rows(rows())
+
+    def _parse_data_parquet(self):
+        """解析 Parquet 数据（生成器，按批读取列再转成行）"""
+        def rows():
+            parquet_file = pq.ParquetFile(self.file_path)
+            for batch in parquet_file.iter_batches(batch_size=self.DISPLAY_CHUNK_SIZE):
+                yield from zip(*(column.to_pylist() for column in batch.columns))
+        return self._parse_rows(rows())
+
+    def iter_rows(self):
+        """逐行获取员工数据
+
+        流式模式下边读边产出，不占用整表内存，可直接交给 send_batch 使用
 
-        for row_idx in range(1, self.sheet.nrows):
-            row_values = self.sheet.row_values(row_idx)
+        Returns:
+            员工数据生成器
+        """
+        if not self.streaming:
+            return iter(self.data)
+        parse = getattr(self, self.FORMATS[self.file_type][1])
+        return self._iter_with_display(parse())
 
-            # 跳过空行
-            if not any(row_values):
-                continue
+    def get_table(self):
+        """获取列式工资表
 
-            employee_data = {}
-            for col_idx, value in enumerate(row_values):
-                if col_idx < len(self.headers):
-                    header = self.headers[col_idx]
-                    field_name = self.FIELD_MAPPING.get(header, header)
-
-                    # 处理数字格式
-                    if isinstance(value, (int, float)):
-                        employee_data[field_name] = round(value, 2) if value else 0
-                    else:
-                        employee_data[field_name] = value if value else ''
-
-            # 如果没有发放月份列，自动添加默认值
-            if not self.has_pay_month:
-                employee_data['pay_month'] = self.default_pay_month
-            # 如果有发放月份列为空，也使用默认值
-            elif not employee_data.get('pay_month'):
-                employee_data['pay_month'] = self.default_pay_month
+        流式模式下边读边写入列数组，不会生成整表的字典列表
 
-            # 验证必填字段
-            if not employee_data.get('name') or not employee_data.get('email'):
-                logger.warning(f"第 {row_idx + 1} 行数据不完整，跳过")
-                continue
+        Returns:
+            PayrollTable
+        """
+        fields = [field for _, field, _ in self.column_plan]
+        return PayrollTable.from_rows(self.iter_rows(), fields)
 
-            data_list.append(employee_data)
+    def get_by_id(self, row_id):
+        """按行 ID 获取员工数据"""
+        return self.index_by_id.get(row_id)
 
-        return data_list
+    def get_by_email(self, email):
+        """按邮箱获取员工数据（忽略大小写）"""
+        return self.index_by_email.get(str(email).strip().lower())
 
     def get_data(self):
         """获取所有数据
 
         Returns:
-            员工数据列表
+            员工数据列表（流式模式下会读取整表）
         """
+        if self.streaming:
+            return list(self.iter_rows())
         return self.data
 
     def get_preview_data(self, count=3):
@@ -219,16 +769,39 @@ class ExcelReader:
         Returns:
             前 N 条员工数据
         """
+        if self.streaming:
+            return list(islice(self.iter_rows(), count))
         return self.data[:count]
 
     def get_total_count(self):
         """获取数据总数
 
+        流式模式或延迟解析尚未完成时根据工作表尺寸估算（含不完整行，为上限值）；
+        工作表没有记录尺寸时（如 write_only 模式写出的 xlsx）数一遍非空行
+
         Returns:
             员工总数
         """
+        if self.streaming or self._pending_rows is not None:
+            if self._row_count is not None:
+                return self._row_count
+            if self.file_type == 'xlsx':
+                if self.sheet.max_row:
+                    return max(self.sheet.max_row - 1, 0)
+                self._row_count = sum(1 for row in self.sheet.iter_rows(min_row=2, values_only=True) if any(row))
+                return self._row_count
+            if self.file_type == 'xls':
+                return max(self.sheet.nrows - 1, 0)
+            return self._row_estimate
         return len(self.data)
 
+    def close(self):
+        """关闭工作簿（流式和延迟解析模式下会占用文件句柄或内存映射）"""
+        if self.file_type == 'xlsx' and (self.streaming or self.deferred) and self.workbook:
+            self.workbook.close()
+        elif self.file_type == 'xls':
+            self._release_xls()
+
     def get_headers(self):
         """获取表头
 
@@ -237,10 +810,41 @@ class ExcelReader:
         """
         return self.headers
 
+    def get_fields(self):
+        """获取数据中的字段（已按 FIELD_MAPPING 转换，没有发放月份列时会自动补上）
+
+        Returns:
+            字段名集合
+        """
+        fields = {field for _, field, _ in self.column_plan}
+        fields.add('pay_month')
+        return fields
+
     def __len__(self):
         """获取数据数量"""
-        return len(self.data)
+        return self.get_total_count()
 
     def __iter__(self):
         """迭代器"""
-        return iter(self.data)
+        return self.iter_rows()
+
+
+# 员工记录类型：FIELD_MAPPING 中的字段和行 ID、来源为属性，其余列放入溢出字典
+Employee = create_employee_type(
+    list(ExcelReader.FIELD_MAPPING.values()) + ['_row_id', '_source'],
+    module=__name__
+)
+
+
+def _parse_source(task):
+    """在子进程中解析单个工作表
+
+    Args:
+        task: (文件路径, 工作表, ExcelCache 或 None)
+
+    Returns:
+        (文件类型, 表头, 员工数据列表)
+    """
+    file_path, sheet, cache = task
+    reader = ExcelReader(file_path, cache=cache, sheets=sheet)
+    return reader.file_type, reader.headers, reader.data
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+金额处理模块
+
+金额在读取时统一转换为以「分」为单位的整数，避免浮点误差；
+显示用字符串（千分位、两位小数）按列批量生成，渲染时只做字符串替换
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+# 金额字段（以分为单位存储）
+MONEY_FIELDS = (
+    'base_salary', 'performance_salary', 'live_salary', 'commission',
+    'service_bonus', 'pre_tax_salary', 'social_security', 'housing_fund',
+    'special_deduction', 'total_deduction', 'accumulated_taxable',
+    'accumulated_tax', 'current_tax', 'net_salary',
+)
+
+# 金额字段在显示元组中的位置
+MONEY_INDEX = {field: idx for idx, field in enumerate(MONEY_FIELDS)}
+
+_CENT = Decimal('0.01')
+_INF = float('inf')
+
+
+def to_cents(value):
+    """将单元格中的金额转换为分
+
+    Args:
+        value: 数字、数字字符串（可含千分位逗号）或空值
+
+    Returns:
+        整数（分）；空值为 0；无法识别的文本原样返回
+    """
+    if value.__class__ is int:
+        return value * 100
+    if value.__class__ is float:
+        # NaN / 无穷大不是金额
+        if value != value or value in (_INF, -_INF):
+            return value
+        scaled = value * 100
+        cents = round(scaled)
+        # 绝大多数金额最多两位小数，直接取整即可；否则按十进制四舍五入
+        if abs(scaled - cents) < 1e-6:
+            return int(cents)
+        return int(Decimal(repr(value)).quantize(_CENT, ROUND_HALF_UP) * 100)
+    if value is None or value == '':
+        return 0
+    if isinstance(value, str):
+        text = value.strip().replace(',', '')
+        if not text:
+            return 0
+        try:
+            amount = Decimal(text)
+        except InvalidOperation:
+            return value
+        # "nan"、"inf" 等文本能被 Decimal 解析，但不是金额
+        if not amount.is_finite():
+            return value
+        try:
+            return int(amount.quantize(_CENT, ROUND_HALF_UP) * 100)
+        except InvalidOperation:
+            # 位数超出 Decimal 精度
+            return value
+    return value
+
+
+def format_cents(cents):
+    """将分格式化为显示字符串，如 750000 -> '7,500.00'
+
+    Args:
+        cents: 整数（分）；非整数（无法识别的原始文本）原样转为字符串
+    """
+    if cents.__class__ is not int:
+        return str(cents)
+    sign = '-' if cents < 0 else ''
+    yuan, fen = divmod(abs(cents), 100)
+    return f"{sign}{yuan:,}.{fen:02d}"
+
+
+def format_column(values, cache=None):
+    """批量格式化一列金额，相同金额只格式化一次
+
+    Args:
+        values: 分的序列
+        cache: 金额 -> 显示字符串 的缓存字典，可跨列、跨批次共用
+
+    Returns:
+        显示字符串列表
+    """
+    if cache is None:
+        cache = {}
+    result = []
+    append = result.append
+    for cents in values:
+        text = cache.get(cents)
+        if text is None:
+            text = cache[cents] = format_cents(cents)
+        append(text)
+    return result
+
+
+_CN_DIGITS = '零壹贰叁肆伍陆柒捌玖'
+_CN_UNITS = ('', '拾', '佰', '仟')
+_CN_GROUP_UNITS = ('', '万', '亿', '万亿')
+
+
+def _chinese_group(number):
+    """四位以内的数字转大写（不含前导零）"""
+    text = ''
+    zero = False
+    for position in range(3, -1, -1):
+        digit = number // 10 ** position % 10
+        if digit == 0:
+            zero = bool(text)
+        else:
+            if zero:
+                text += '零'
+                zero = False
+            text += _CN_DIGITS[digit] + _CN_UNITS[position]
+    return text
+
+
+def _chinese_integer(number):
+    """整数转大写，每四位一组"""
+    groups = []
+    while number:
+        groups.append(number % 10000)
+        number //= 10000
+
+    text = ''
+    zero = False
+    for idx in range(len(groups) - 1, -1, -1):
+        group = groups[idx]
+        if group == 0:
+            zero = bool(text)
+            continue
+        if text and (zero or group < 1000):
+            text += '零'
+        text += _chinese_group(group) + _CN_GROUP_UNITS[idx]
+        zero = False
+    return text
+
+
+def to_chinese_upper(cents):
+    """将分转换为人民币大写金额，如 123450 -> '壹仟贰佰叁拾肆元伍角整'
+
+    Args:
+        cents: 整数（分）；非整数原样转为字符串
+    """
+    if cents.__class__ is not int:
+        return str(cents)
+    if cents == 0:
+        return '零元整'
+
+    sign = '负' if cents < 0 else ''
+    yuan, fen = divmod(abs(cents), 100)
+    jiao, fen = divmod(fen, 10)
+
+    text = _chinese_integer(yuan) + '元' if yuan else ''
+    if jiao:
+        text += _CN_DIGITS[jiao] + '角'
+    elif yuan and fen:
+        text += '零'
+    if fen:
+        text += _CN_DIGITS[fen] + '分'
+    else:
+        text += '整'
+    return sign + text
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+列式工资表模块
+
+按列存储工资数据：金额列为以「分」为单位的 int64 数组，天数列为 float64 数组，
+姓名、邮箱、月份等文本做字符串驻留，整列汇总、筛选只需对数组做一次运算
+"""
+
+import sys
+from array import array
+from core import money
+from utils.logger import logger
+
+
+class PayrollTable:
+    """列式工资表"""
+
+    # 金额字段：以分为单位存储在 int64 数组中
+    MONEY_FIELDS = money.MONEY_FIELDS
+
+    # 数值字段：float64 数组
+    NUMBER_FIELDS = ('expected_days', 'actual_days')
+
+    # 文本字段：驻留字符串列表（同一月份等重复值只保存一份）
+    STRING_FIELDS = ('name', 'email', 'pay_month')
+
+    def __init__(self, fields=()):
+        """初始化空表
+
+        Args:
+            fields: 字段名列表（未知字段按文本列存储）
+        """
+        self.fields = []
+        self.columns = {}
+        self.kinds = {}  # {字段: 'money' / 'number' / 'text'}
+        self.bad_cells = {}  # {字段: [(行号, 原始值), ...]} 金额/数值列中无法解析的单元格
+        self._display = {}  # {金额字段: 显示字符串列表}，按需整列生成
+        self._length = 0
+        for field in fields:
+            self._add_column(field)
+        for field in self.STRING_FIELDS:
+            self._add_column(field)
+
+    def _add_column(self, field):
+        """添加一列（已存在则忽略）"""
+        if field in self.columns:
+            return
+        self.fields.append(field)
+        if field in self.MONEY_FIELDS:
+            self.kinds[field] = 'money'
+            self.columns[field] = array('q', bytes(8 * self._length))
+        elif field in self.NUMBER_FIELDS:
+            self.kinds[field] = 'number'
+            self.columns[field] = array('d', bytes(8 * self._length))
+        else:
+            self.kinds[field] = 'text'
+            self.columns[field] = [''] * self._length
+
+    @classmethod
+    def from_rows(cls, rows, fields=()):
+        """从员工数据字典序列构建表
+
+        Args:
+            rows: 员工数据字典的可迭代对象（可以是流式生成器）
+            fields: 预先确定的字段名列表
+
+        Returns:
+            PayrollTable
+        """
+        table = cls(fields)
+        for row in rows:
+            table.append(row)
+        logger.info(f"列式工资表构建完成，共 {len(table)} 行")
+        return table
+
+    def append(self, row):
+        """追加一行
+
+        Args:
+            row: 员工数据字典（金额字段为分，与 ExcelReader 的输出一致）
+        """
+        index = self._length
+        self._display.clear()
+        columns = self.columns
+        for field in row:
+            if field not in columns:
+                self._add_column(field)
+
+        kinds = self.kinds
+        for field, column in columns.items():
+            value = row.get(field, '')
+            kind = kinds[field]
+            if kind == 'money':
+                column.append(self._to_cents(field, index, value))
+            elif kind == 'number':
+                column.append(self._to_float(field, index, value))
+            elif isinstance(value, str):
+                column.append(sys.intern(value))
+            else:
+                column.append(value)
+        self._length += 1
+
+    def _to_cents(self, field, index, value):
+        """金额（分）写入 int64 列，无法识别的文本记为错误单元格"""
+        if value.__class__ is int:
+            return value
+        if value == '' or value is None:
+            return 0
+        self.bad_cells.setdefault(field, []).append((index, value))
+        return 0
+
+    def _to_float(self, field, index, value):
+        """转换为浮点数"""
+        if value == '' or value is None:
+            return 0.0
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            self.bad_cells.setdefault(field, []).append((index, value))
+            return 0.0
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        """逐行迭代行视图"""
+        for index in range(self._length):
+            yield PayrollRow(self, index)
+
+    def __getitem__(self, index):
+        """获取行视图"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return PayrollRow(self, index)
+
+    def column(self, field):
+        """获取整列数据（金额列单位为分）"""
+        return self.columns[field]
+
+    def display_column(self, field):
+        """获取金额列的显示字符串（整列生成一次后缓存）"""
+        display = self._display.get(field)
+        if display is None:
+            display = self._display[field] = money.format_column(self.columns[field])
+        return display
+
+    def total(self, field):
+        """列合计
+
+        Args:
+            field: 字段名
+
+        Returns:
+            金额列返回元（保留两位小数），数值列返回浮点合计
+        """
+        if self.kinds[field] == 'money':
+            return sum(self.columns[field]) / 100
+        return sum(self.columns[field])
+
+    def where(self, field, predicate):
+        """按列筛选行号
+
+        Args:
+            field: 字段名
+            predicate: 对列值的判断函数（金额列传入的是分）
+
+        Returns:
+            满足条件的行号列表
+        """
+        return [index for index, value in enumerate(self.columns[field]) if predicate(value)]
+
+    def take(self, indices):
+        """按行号取出子表
+
+        Args:
+            indices: 行号列表
+
+        Returns:
+            新的 PayrollTable
+        """
+        table = PayrollTable()
+        table.fields = list(self.fields)
+        table.kinds = dict(self.kinds)
+        for field, column in self.columns.items():
+            if isinstance(column, array):
+                table.columns[field] = array(column.typecode, [column[i] for i in indices])
+            else:
+                table.columns[field] = [column[i] for i in indices]
+        table._length = len(indices)
+        return table
+
+    def summary(self, by='pay_month', fields=None):
+        """按某列分组汇总金额
+
+        Args:
+            by: 分组字段，默认按发放月份
+            fields: 要汇总的金额字段，默认全部金额字段
+
+        Returns:
+            {分组值: {字段: 合计(元), 'count': 人数}}
+        """
+        fields = [f for f in (fields or self.MONEY_FIELDS) if self.kinds.get(f) == 'money']
+        keys = self.columns[by]
+        groups = {}
+        for index, key in enumerate(keys):
+            groups.setdefault(key, []).append(index)
+
+        result = {}
+        for key, indices in groups.items():
+            if len(indices) == self._length:
+                totals = {f: sum(self.columns[f]) / 100 for f in fields}
+            else:
+                totals = {f: sum(self.columns[f][i] for i in indices) / 100 for f in fields}
+            totals['count'] = len(indices)
+            result[key] = totals
+        return result
+
+    def to_dicts(self):
+        """转换为员工数据字典列表"""
+        return [row.to_dict() for row in self]
+
+
+class PayrollRow:
+    """工资表的行视图，按字典方式读取（金额为分），供模板渲染使用"""
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, field):
+        return self.table.columns[field][self.index]
+
+    @property
+    def display(self):
+        """金额字段的显示字符串元组（顺序同 money.MONEY_FIELDS）"""
+        table = self.table
+        return tuple(table.display_column(field)[self.index] if field in table.columns else '0.00'
+                     for field in money.MONEY_FIELDS)
+
+    def get(self, field, default=None):
+        if field not in self.table.columns:
+            return default
+        return self[field]
+
+    def __contains__(self, field):
+        return field in self.table.columns
+
+    def keys(self):
+        return list(self.table.fields)
+
+    def items(self):
+        return [(field, self[field]) for field in self.table.fields]
+
+    def to_dict(self):
+        """转换为普通字典"""
+        return dict(self.items())
+
+    def copy(self):
+        return self.to_dict()
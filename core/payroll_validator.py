@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+工资数据校验模块
+
+按列对整张工资表做一次性校验：邮箱格式、重复邮箱、金额非数字、
+应发/扣款/实发之间的金额勾稽关系，生成可在发送前展示的校验报告
+"""
+
+import re
+from collections import Counter
+from core.money import MONEY_FIELDS, format_cents
+from utils.logger import logger
+
+
+class ValidationReport:
+    """校验报告"""
+
+    def __init__(self, row_count):
+        """初始化校验报告
+
+        Args:
+            row_count: 参与校验的行数
+        """
+        self.row_count = row_count
+        self.issues = []  # [{'level', 'code', 'row_id', 'name', 'field', 'message'}, ...]
+
+    def add(self, level, code, row_id, name, field, message):
+        """添加一条问题"""
+        self.issues.append({
+            'level': level,
+            'code': code,
+            'row_id': row_id,
+            'name': name,
+            'field': field,
+            'message': message,
+        })
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue['level'] == 'error']
+
+    @property
+    def warnings(self):
+        return [issue for issue in self.issues if issue['level'] == 'warning']
+
+    @property
+    def has_issues(self):
+        return bool(self.issues)
+
+    def count_by_code(self):
+        """按问题类型统计数量"""
+        return Counter(issue['code'] for issue in self.issues)
+
+    def summary_text(self, limit=20):
+        """生成供界面展示的摘要文本
+
+        Args:
+            limit: 最多列出的问题条数
+        """
+        if not self.issues:
+            return f"共 {self.row_count} 行，未发现问题"
+
+        counts = self.count_by_code()
+        lines = [f"共 {self.row_count} 行，错误 {len(self.errors)} 个，警告 {len(self.warnings)} 个"]
+        lines.extend(f"· {PayrollValidator.CODE_NAMES.get(code, code)}: {count}" for code, count in counts.items())
+        lines.append('')
+        for issue in self.issues[:limit]:
+            mark = '✗' if issue['level'] == 'error' else '⚠'
+            lines.append(f"{mark} 第 {issue['row_id']} 行 {issue['name']}: {issue['message']}")
+        if len(self.issues) > limit:
+            lines.append(f"... 等 {len(self.issues)} 个问题")
+        return '\n'.join(lines)
+
+
+class PayrollValidator:
+    """工资数据校验器"""
+
+    EMAIL_PATTERN = re.compile(r'^[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}$')
+
+    # 应发工资的组成部分
+    INCOME_FIELDS = ('base_salary', 'performance_salary', 'live_salary', 'commission', 'service_bonus')
+
+    CODE_NAMES = {
+        'invalid_email': '邮箱格式错误',
+        'duplicate_email': '邮箱重复',
+        'non_numeric': '金额不是数字',
+        'net_mismatch': '应发 - 扣款 - 个税 ≠ 实发',
+        'income_mismatch': '收入明细之和 ≠ 应发',
+    }
+
+    def __init__(self, tolerance_cents=1, deduction_includes_tax=False):
+        """初始化校验器
+
+        Args:
+            tolerance_cents: 金额勾稽允许的误差（分）
+            deduction_includes_tax: 扣款合计（本月扣除项累计）是否已包含个税。
+                默认不包含（社保 + 公积金 + 专项抵扣），实发 = 应发 - 扣款合计 - 个税
+        """
+        self.tolerance = tolerance_cents
+        self.deduction_includes_tax = deduction_includes_tax
+
+    def validate(self, rows):
+        """校验整张工资表
+
+        Args:
+            rows: 员工数据列表（金额字段为分）
+
+        Returns:
+            ValidationReport
+        """
+        rows = list(rows)
+        report = ValidationReport(len(rows))
+        row_ids = [row.get('_row_id', str(i + 1)) for i, row in enumerate(rows)]
+        names = [row.get('name', '') for row in rows]
+
+        self._check_emails(report, rows, row_ids, names)
+
+        # 按列转换金额，记录非数字单元格
+        cents = {}
+        for field in MONEY_FIELDS:
+            cents[field] = self._column_to_cents(report, field, rows, row_ids, names)
+
+        self._check_amounts(report, cents, row_ids, names)
+
+        logger.info(f"数据校验完成: 错误 {len(report.errors)} 个，警告 {len(report.warnings)} 个")
+        return report
+
+    def _check_emails(self, report, rows, row_ids, names):
+        """检查邮箱格式和重复"""
+        emails = [str(row.get('email', '')).strip() for row in rows]
+        match = self.EMAIL_PATTERN.match
+        for i, email in enumerate(emails):
+            if not match(email):
+                report.add('error', 'invalid_email', row_ids[i], names[i], 'email', f"邮箱格式错误: {email}")
+
+        counts = Counter(email.lower() for email in emails)
+        duplicated = {email for email, count in counts.items() if count > 1}
+        if duplicated:
+            for i, email in enumerate(emails):
+                if email.lower() in duplicated:
+                    report.add('warning', 'duplicate_email', row_ids[i], names[i], 'email', f"邮箱重复: {email}")
+
+    def _column_to_cents(self, report, field, rows, row_ids, names):
+        """取出一列金额（分），空值为 0，无法识别的文本记为错误"""
+        column = [row.get(field, 0) for row in rows]
+        # 快速路径：整列都已是分（ExcelReader 读取时完成转换）
+        if all(value.__class__ is int for value in column):
+            return column
+
+        result = []
+        append = result.append
+        for i, value in enumerate(column):
+            if value.__class__ is int:
+                append(value)
+            elif value == '' or value is None:
+                append(0)
+            else:
+                report.add('error', 'non_numeric', row_ids[i], names[i], field, f"{field} 不是数字: {value}")
+                append(0)
+        return result
+
+    def _check_amounts(self, report, cents, row_ids, names):
+        """检查金额勾稽关系"""
+        tolerance = self.tolerance
+        pre_tax = cents['pre_tax_salary']
+
+        # 应发 - 扣款合计 - 个税 = 实发（扣款合计已含个税时不再减个税）
+        tax_column = [0] * len(pre_tax) if self.deduction_includes_tax else cents['current_tax']
+        columns = zip(pre_tax, cents['total_deduction'], tax_column, cents['net_salary'])
+        for i, (gross, deduction, tax, net) in enumerate(columns):
+            if abs(gross - deduction - tax - net) > tolerance:
+                report.add('warning', 'net_mismatch', row_ids[i], names[i], 'net_salary',
+                           f"应发 {format_cents(gross)} - 扣款 {format_cents(deduction)} - 个税 {format_cents(tax)}"
+                           f" ≠ 实发 {format_cents(net)}")
+
+        # 收入明细之和 = 应发
+        income_sums = [sum(parts) for parts in zip(*(cents[f] for f in self.INCOME_FIELDS))]
+        for i, (income, gross) in enumerate(zip(income_sums, pre_tax)):
+            if abs(income - gross) > tolerance:
+                report.add('warning', 'income_mismatch', row_ids[i], names[i], 'pre_tax_salary',
+                           f"收入明细合计 {format_cents(income)} ≠ 应发 {format_cents(gross)}")
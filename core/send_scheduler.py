@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+定时发送模块
+
+支持定时开始、限定发送时间段、按每日额度均匀分摊发送，
+发送队列持久化到本地文件，程序重启后可继续发送。
+队列文件只保存待发送员工的行 ID 和邮箱，不保存工资数据，继续发送时重新读取 Excel
+"""
+
+import os
+import json
+import uuid
+import threading
+from datetime import datetime, time as dt_time, timedelta
+from core.excel_reader import ExcelReader
+from utils.config import app_path
+from utils.logger import logger
+
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class SendSchedule:
+    """发送计划：开始时间 + 允许的时间段 + 每日额度"""
+
+    def __init__(self, start_at=None, windows=None, daily_quota=0):
+        """初始化发送计划
+
+        Args:
+            start_at: 开始时间 (datetime)，为空则立即开始
+            windows: 允许发送的时间段列表 [(time, time), ...]，为空则全天
+            daily_quota: 每日最多发送数量，0 表示不限
+        """
+        self.start_at = start_at
+        self.windows = sorted(windows or [])
+        self.daily_quota = daily_quota
+
+    @staticmethod
+    def parse_windows(text):
+        """解析时间段字符串
+
+        Args:
+            text: 如 "09:00-18:00" 或 "09:00-12:00,13:30-18:00"
+
+        Returns:
+            [(time, time), ...]
+        """
+        windows = []
+        for part in (text or '').split(','):
+            part = part.strip()
+            if not part:
+                continue
+            start_text, end_text = part.split('-')
+            start = datetime.strptime(start_text.strip(), '%H:%M').time()
+            end = datetime.strptime(end_text.strip(), '%H:%M').time()
+            if start >= end:
+                raise ValueError(f"无效的发送时间段: {part}")
+            windows.append((start, end))
+        return windows
+
+    def _day_windows(self, day):
+        """获取某一天的时间段 [(datetime, datetime), ...]"""
+        if not self.windows:
+            start = datetime.combine(day, dt_time.min)
+            return [(start, start + timedelta(days=1))]
+        return [(datetime.combine(day, s), datetime.combine(day, e)) for s, e in self.windows]
+
+    def align(self, moment):
+        """将时间调整到最近的允许发送时刻（>= moment）"""
+        day = moment.date()
+        while True:
+            for start, end in self._day_windows(day):
+                if moment < end:
+                    return max(moment, start)
+            day += timedelta(days=1)
+            moment = datetime.combine(day, dt_time.min)
+
+    def seconds_left_today(self, moment):
+        """当天从 moment 起剩余的可发送秒数"""
+        total = 0.0
+        for start, end in self._day_windows(moment.date()):
+            if moment < end:
+                total += (end - max(moment, start)).total_seconds()
+        return total
+
+    def advance(self, moment, seconds):
+        """从 moment 起，在允许的时间段内前进指定的可发送秒数"""
+        moment = self.align(moment)
+        while True:
+            for start, end in self._day_windows(moment.date()):
+                if moment >= end:
+                    continue
+                moment = max(moment, start)
+                available = (end - moment).total_seconds()
+                if seconds < available:
+                    return moment + timedelta(seconds=seconds)
+                seconds -= available
+                moment = end
+            moment = self.align(moment)
+
+    def to_dict(self):
+        return {
+            'start_at': self.start_at.strftime(TIME_FORMAT) if self.start_at else None,
+            'windows': ','.join(f"{s.strftime('%H:%M')}-{e.strftime('%H:%M')}" for s, e in self.windows),
+            'daily_quota': self.daily_quota,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        start_at = data.get('start_at')
+        return cls(
+            start_at=datetime.strptime(start_at, TIME_FORMAT) if start_at else None,
+            windows=cls.parse_windows(data.get('windows', '')),
+            daily_quota=int(data.get('daily_quota', 0)),
+        )
+
+
+class ScheduledJob:
+    """定时发送任务"""
+
+    def __init__(self, employees, subject_template, template_config, schedule, job_id=None, source=None):
+        """初始化定时任务
+
+        Args:
+            employees: 待发送员工列表
+            subject_template: 邮件主题模板
+            template_config: 模板配置
+            schedule: SendSchedule
+            job_id: 任务 ID
+            source: 员工数据来源 {'paths': [Excel 路径], 'sheets': 工作表设置}，继续发送时据此重新读取
+        """
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        self.pending = [dict(emp) for emp in employees]
+        self.resolved = True  # 从队列文件恢复的任务在发送前需要重新读取员工数据
+        self.source = dict(source or {})
+        self.subject_template = subject_template
+        self.template_config = dict(template_config)
+        self.schedule = schedule
+        self.results = []
+        self.sent_per_day = {}  # {'2026-01-05': 120}
+        self.next_at = None
+        self.created_at = datetime.now()
+
+    @property
+    def finished(self):
+        return not self.pending
+
+    def sent_on(self, day):
+        """某天已发送数量"""
+        return self.sent_per_day.get(day.isoformat(), 0)
+
+    def next_send_time(self, now):
+        """计算下一封邮件的发送时间
+
+        Args:
+            now: 当前时间
+
+        Returns:
+            datetime
+        """
+        moment = max(t for t in (now, self.schedule.start_at, self.next_at) if t)
+        moment = self.schedule.align(moment)
+
+        # 当天额度已用完，顺延到下一天的第一个时间段
+        quota = self.schedule.daily_quota
+        while quota and self.sent_on(moment.date()) >= quota:
+            next_day = datetime.combine(moment.date() + timedelta(days=1), dt_time.min)
+            moment = self.schedule.align(next_day)
+        return moment
+
+    def record(self, result, sent_at):
+        """记录一封邮件的发送结果并计算下次发送时间
+
+        将当天剩余的可发送时间按剩余额度均匀分摊，首尾留出相同间隔
+
+        Args:
+            result: 发送结果字典
+            sent_at: 发送时间
+        """
+        self.pending.pop(0)
+        self.results.append(result)
+        day_key = sent_at.date().isoformat()
+        self.sent_per_day[day_key] = self.sent_per_day.get(day_key, 0) + 1
+
+        quota = self.schedule.daily_quota
+        slots = min(quota - self.sent_per_day[day_key], len(self.pending)) if quota else 0
+        if slots > 0:
+            gap = self.schedule.seconds_left_today(sent_at) / (slots + 1)
+            self.next_at = self.schedule.advance(sent_at, gap)
+        else:
+            self.next_at = sent_at
+
+    @staticmethod
+    def _pending_ref(employee):
+        """待发送员工在队列文件中的记录：只保存定位员工所需的信息"""
+        if 'row_id' in employee and '_row_id' not in employee:
+            return employee  # 尚未重新读取的恢复任务
+        return {
+            'row_id': employee.get('_row_id'),
+            'email': str(employee.get('email', '')),
+            'pay_month': str(employee.get('pay_month', '')),
+        }
+
+    def resolve(self, reader=None):
+        """从队列文件恢复的任务只有行 ID，发送前重新读取 Excel 取回员工数据
+
+        按行 ID 查找并核对邮箱，行 ID 对不上时按邮箱查找（邮箱重复时不猜测）；
+        找不到的员工记为发送失败，不会把别人的工资条发出去
+
+        Args:
+            reader: 已加载的 ExcelReader，为空时按 source 重新读取
+
+        Returns:
+            找不到的员工数
+        """
+        if self.resolved:
+            return 0
+        if reader is None:
+            paths = self.source.get('paths') or []
+            if not paths:
+                raise ValueError("定时任务没有记录 Excel 文件，无法继续发送")
+            reader = ExcelReader(paths if len(paths) > 1 else paths[0], sheets=self.source.get('sheets'))
+
+        pending = []
+        missing = 0
+        for ref in self.pending:
+            # 旧版本的队列文件保存的是完整员工数据，行 ID 在 _row_id 中
+            row_id = ref.get('row_id', ref.get('_row_id'))
+            email = str(ref.get('email', '')).strip().lower()
+            record = reader.get_by_id(row_id)
+            if record is None or str(record.get('email', '')).strip().lower() != email:
+                record = reader.get_by_email(email) if email not in reader.duplicate_emails else None
+            if record is None:
+                missing += 1
+                self.results.append({
+                    'row_id': row_id,
+                    'name': '',
+                    'email': ref.get('email', ''),
+                    'success': False,
+                    'message': 'Excel 中找不到该员工，未发送',
+                    'attempts': 0,
+                })
+                continue
+            employee = dict(record)
+            if ref.get('pay_month'):
+                # 创建任务时可能修改过发放月份
+                employee['pay_month'] = ref['pay_month']
+            pending.append(employee)
+
+        self.pending = pending
+        self.resolved = True
+        if missing:
+            logger.warning(f"定时任务 {self.job_id}：{missing} 名员工在 Excel 中已找不到，未发送")
+        return missing
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'pending': [self._pending_ref(employee) for employee in self.pending],
+            'source': self.source,
+            'subject_template': self.subject_template,
+            'template_config': self.template_config,
+            'schedule': self.schedule.to_dict(),
+            'results': self.results,
+            'sent_per_day': self.sent_per_day,
+            'next_at': self.next_at.strftime(TIME_FORMAT) if self.next_at else None,
+            'created_at': self.created_at.strftime(TIME_FORMAT),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(
+            employees=data.get('pending', []),
+            subject_template=data['subject_template'],
+            template_config=data.get('template_config', {}),
+            schedule=SendSchedule.from_dict(data.get('schedule', {})),
+            job_id=data['job_id'],
+            source=data.get('source'),
+        )
+        job.resolved = False
+        job.results = data.get('results', [])
+        job.sent_per_day = data.get('sent_per_day', {})
+        if data.get('next_at'):
+            job.next_at = datetime.strptime(data['next_at'], TIME_FORMAT)
+        if data.get('created_at'):
+            job.created_at = datetime.strptime(data['created_at'], TIME_FORMAT)
+        return job
+
+
+class SendQueue:
+    """持久化的定时发送队列"""
+
+    def __init__(self, queue_file=None):
+        """初始化发送队列
+
+        Args:
+            queue_file: 队列文件路径，默认为程序目录下的 send_queue.json
+        """
+        self.queue_file = queue_file or app_path('send_queue.json')
+        self.jobs = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """加载队列文件"""
+        if not os.path.exists(self.queue_file):
+            return
+        try:
+            with open(self.queue_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.jobs = [ScheduledJob.from_dict(item) for item in data.get('jobs', [])]
+            logger.info(f"已加载 {len(self.jobs)} 个定时发送任务")
+        except Exception as e:
+            logger.error(f"加载定时发送队列失败: {e}")
+            self.jobs = []
+
+    def save(self):
+        """保存队列（先写临时文件再替换，避免中途退出损坏文件）"""
+        with self._lock:
+            data = {'jobs': [job.to_dict() for job in self.jobs if not job.finished]}
+            temp_file = self.queue_file + '.tmp'
+            try:
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    # 日期等非 JSON 类型（如日期格式的单元格）转为字符串
+                    json.dump(data, f, ensure_ascii=False, default=_json_default)
+                os.replace(temp_file, self.queue_file)
+            finally:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+
+    def add_job(self, job):
+        """添加任务并保存"""
+        self.jobs.append(job)
+        self.save()
+
+    def pending_jobs(self):
+        """获取未完成的任务"""
+        return [job for job in self.jobs if not job.finished]
+
+
+def _json_default(value):
+    """JSON 编码无法直接处理的值：日期时间用 ISO 格式，其余转为字符串"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
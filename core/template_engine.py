@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+编译型模板模块
+
+加载模板时把 HTML 一次性拆分为常量字节片段和变量槽位（{{ 字段名 }}），
+渲染时只取变量值、转义后拼接，不再重复生成整段 HTML 和样式表
+"""
+
+import re
+from html import escape
+from utils.logger import logger
+
+
+class CompiledTemplate:
+    """编译后的模板：常量片段与变量槽位交替排列"""
+
+    # 变量槽位：{{ 字段名 }}
+    SLOT_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+    def __init__(self, source, name='<template>'):
+        """编译模板
+
+        Args:
+            source: 模板文本
+            name: 模板名称（用于日志）
+        """
+        self.name = name
+        segments = []
+        slots = []
+        position = 0
+        for match in self.SLOT_PATTERN.finditer(source):
+            segments.append(source[position:match.start()].encode('utf-8'))
+            slots.append(match.group(1))
+            position = match.end()
+        segments.append(source[position:].encode('utf-8'))
+
+        # 渲染时直接把槽位的值填入 parts 的奇数位置，再整体 join
+        self._parts = [b''] * (len(segments) + len(slots))
+        self._parts[0::2] = segments
+        self.slots = tuple(slots)
+        # 模板引用到的字段（去重，保持出现顺序）
+        self.fields = tuple(dict.fromkeys(slots))
+        logger.info(f"模板编译完成: {name}（{len(segments)} 个片段，{len(self.fields)} 个字段）")
+
+    @classmethod
+    def from_file(cls, path):
+        """从文件读取并编译模板"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(f.read(), name=path)
+
+    def render(self, template_vars):
+        """渲染模板
+
+        Args:
+            template_vars: 提供 get(字段, 默认值) 的模板变量（如 TemplateVars）
+
+        Returns:
+            UTF-8 编码的 HTML 字节串
+        """
+        get = template_vars.get
+        # 同一字段在模板中多次出现时只取值、转义一次
+        values = {field: escape(str(get(field, ''))).encode('utf-8') for field in self.fields}
+        parts = self._parts.copy()
+        parts[1::2] = [values[slot] for slot in self.slots]
+        return b''.join(parts)
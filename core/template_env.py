@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Jinja2 模板环境模块
+
+全局共用一个 Jinja2 Environment：开启自动转义，编译结果通过文件系统字节码缓存
+保存在磁盘上，程序再次启动时直接加载；提供金额格式化过滤器。
+模板按文件路径加载，既可以是 Word 模板转换得到的 HTML，也可以是用户自己编辑的 HTML 模板
+"""
+
+import os
+import glob
+import hashlib
+from jinja2 import BaseLoader, Environment, FileSystemBytecodeCache, TemplateNotFound, meta
+from core.money import format_cents, to_cents, to_chinese_upper
+from utils.config import app_path
+from utils.logger import logger
+
+
+# Word 模板转换得到的 HTML 模板及其 Jinja2 编译结果的缓存目录
+TEMPLATE_CACHE_DIR = app_path('cache', 'templates')
+
+_jinja_env = None
+# 已编译的模板：{模板路径: (修改时间, 源码哈希, Jinja2 Template, 字段元组)}，
+# 模板未修改时不再重新读取、解析和编译
+_templates = {}
+
+
+class PathLoader(BaseLoader):
+    """按文件绝对路径加载模板，文件修改后自动重新编译"""
+
+    def get_source(self, environment, template):
+        if not os.path.isfile(template):
+            raise TemplateNotFound(template)
+        mtime = os.path.getmtime(template)
+        with open(template, 'r', encoding='utf-8') as f:
+            source = f.read()
+        return source, template, lambda: os.path.isfile(template) and os.path.getmtime(template) == mtime
+
+
+def money_filter(value, symbol=''):
+    """金额过滤器：{{ base_salary|money }} -> 7,500.00，{{ net_salary|money('¥') }} -> ¥6,192.12
+
+    接受分（整数）、元（浮点数）或已格式化的金额字符串；无法识别的文本原样输出
+    """
+    if value.__class__ is not int:
+        value = to_cents(value)
+        if value.__class__ is not int:
+            return value
+    return symbol + format_cents(value)
+
+
+def money_cn_filter(value):
+    """人民币大写过滤器：{{ net_salary|money_cn }} -> 陆仟壹佰玖拾贰元壹角贰分"""
+    if value.__class__ is not int:
+        value = to_cents(value)
+    return to_chinese_upper(value)
+
+
+def get_jinja_env():
+    """获取共用的 Jinja2 环境"""
+    global _jinja_env
+    if _jinja_env is None:
+        if not os.path.exists(TEMPLATE_CACHE_DIR):
+            os.makedirs(TEMPLATE_CACHE_DIR)
+        _jinja_env = Environment(
+            loader=PathLoader(),
+            bytecode_cache=FileSystemBytecodeCache(TEMPLATE_CACHE_DIR),
+            autoescape=True,
+        )
+        _jinja_env.filters['money'] = money_filter
+        _jinja_env.filters['money_cn'] = money_cn_filter
+    return _jinja_env
+
+
+def load_template(path, source=None):
+    """加载并编译模板
+
+    Args:
+        path: 模板文件路径
+        source: 已读取的模板源码；给出时按这份源码编译，不再读取文件
+            （批量渲染的子进程据此使用与主进程完全相同的模板）
+
+    Returns:
+        (Jinja2 Template, 模板引用的字段元组)
+    """
+    env = get_jinja_env()
+    path = os.path.abspath(path)
+    cached = _templates.get(path)
+    if source is None:
+        # 先取修改时间：读取期间文件被改写时，下次调用会重新读取
+        mtime = os.path.getmtime(path) if os.path.isfile(path) else None
+        if cached is not None and cached[0] == mtime:
+            return cached[2], cached[3]
+        source, _, _ = env.loader.get_source(env, path)
+    else:
+        mtime = None
+    digest = hashlib.blake2b(source.encode('utf-8'), digest_size=20).digest()
+    if cached is not None and cached[1] == digest:
+        template, fields = cached[2], cached[3]
+        if mtime is None:
+            mtime = cached[0]
+    else:
+        template = _compile(env, path, source)
+        fields = tuple(sorted(meta.find_undeclared_variables(env.parse(source)) - env.globals.keys()))
+    _templates[path] = (mtime, digest, template, fields)
+    return template, fields
+
+
+def _compile(env, path, source):
+    """编译模板源码，编译结果通过字节码缓存保存在磁盘上（按源码校验，源码不同时重新编译）"""
+    bucket = env.bytecode_cache.get_bucket(env, path, path, source)
+    code = bucket.code
+    if code is None:
+        code = env.compile(source, path, path)
+        bucket.code = code
+        env.bytecode_cache.set_bucket(bucket)
+    return env.template_class.from_code(env, code, env.make_globals(None))
+
+
+def precompile_templates(*directories):
+    """预编译目录中的全部 HTML 模板
+
+    启动时调用一次，之后打开模板、刷新预览都不再解析和编译
+
+    Args:
+        directories: 模板目录
+
+    Returns:
+        编译成功的模板数
+    """
+    count = 0
+    for directory in directories:
+        if not directory or not os.path.isdir(directory):
+            continue
+        for path in glob.glob(os.path.join(directory, '*.htm*')):
+            try:
+                load_template(path)
+                count += 1
+            except Exception as e:
+                logger.warning(f"预编译模板失败 {path}: {e}")
+    logger.info(f"已预编译 {count} 个 HTML 模板")
+    return count
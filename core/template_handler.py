@@ -1,18 +1,127 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-Word 模板处理模块
+模板处理模块
 
-使用 python-docx 读取 Word 模板，替换占位符，生成 HTML 邮件内容
+支持 Word 模板和 HTML 模板：Word 模板先转换为 HTML 模板，HTML 模板用 Jinja2 编译后
+替换占位符生成 HTML 邮件内容；Word 模板中没有占位符时使用内置工资条模板
 """
 
 import os
-import re
-from docx import Document
-from jinja2 import Template
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from core.docx_converter import DocxConverter
+from core.excel_reader import ExcelReader
+from core.money import MONEY_INDEX, format_cents
+from core.template_engine import CompiledTemplate
+from core.template_env import TEMPLATE_CACHE_DIR, get_jinja_env, load_template
 from utils.logger import logger
 
 
+# 内置工资条 HTML 模板
+BUILTIN_TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates', 'payslip.html')
+
+# 可直接使用的 HTML 模板扩展名
+HTML_EXTENSIONS = ('.html', '.htm')
+
+# 批量渲染时每个子进程任务包含的员工数
+RENDER_CHUNK_SIZE = 200
+
+# 渲染结果缓存的条目数上限
+RENDER_CACHE_SIZE = 256
+
+
+_MISSING = object()
+
+
+class TemplateVars:
+    """模板变量视图：直接读取员工数据，金额取预先生成的显示字符串，空值显示为空字符串"""
+
+    __slots__ = ('employee_data', 'overrides', 'display')
+
+    def __init__(self, employee_data, overrides):
+        """初始化模板变量视图
+
+        Args:
+            employee_data: 员工数据（金额字段为分）
+            overrides: 覆盖员工数据的变量（签名、公司名等）
+        """
+        self.employee_data = employee_data
+        self.overrides = overrides
+        # ExcelReader 读取时已按列生成的金额显示字符串
+        self.display = getattr(employee_data, 'display', None)
+
+    def get(self, key, default=None):
+        if key in self.overrides:
+            return self.overrides[key]
+        if self.display is not None and key in MONEY_INDEX:
+            return self.display[MONEY_INDEX[key]]
+        value = self.employee_data.get(key, _MISSING)
+        if value is _MISSING:
+            return format_cents(0) if key in MONEY_INDEX else default
+        if key in MONEY_INDEX:
+            return format_cents(value if value != '' and value is not None else 0)
+        # 处理空值，显示为空字符串
+        if value == '' or value is None:
+            return ''
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+
+class RenderCache:
+    """渲染结果的 LRU 缓存（线程安全）
+
+    预览翻页、刷新以及预览后立即发送时直接复用已渲染的 HTML
+    """
+
+    def __init__(self, max_size=RENDER_CACHE_SIZE):
+        """初始化缓存
+
+        Args:
+            max_size: 条目数上限，超出时淘汰最久未使用的条目
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """读取缓存，未命中返回 None"""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, key, html):
+        """写入缓存"""
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
 class TemplateHandler:
     """模板处理器"""
 
@@ -37,25 +146,149 @@ class TemplateHandler:
         'company_name': 'company_name',
     }
 
-    def __init__(self, template_path):
+    # 由模板配置（而不是 Excel）提供的字段
+    CONFIG_FIELDS = ('email_sign', 'company_name')
+
+    # 已编译的模板，所有处理器共用 {模板路径: CompiledTemplate}
+    _compiled = {}
+
+    def __init__(self, template_path, cache_size=RENDER_CACHE_SIZE):
         """初始化模板处理器
 
         Args:
-            template_path: Word 模板文件路径
+            template_path: Word 模板或 HTML 模板文件路径
+            cache_size: 渲染结果缓存的条目数上限（0 表示不缓存）
         """
         self.template_path = template_path
-        self.document = None
+        self.compiled = None  # 内置模板（CompiledTemplate）
+        self.jinja_template = None  # Word 模板转换后的或用户编辑的 Jinja2 模板
+        self.jinja_source = None  # 编译 jinja_template 所用的 (路径, 源码)，批量渲染时交给子进程
+        self.fields = ()  # 模板引用到的字段
+        self.version = 0  # 模板版本，每次加载模板递增
+        self.render_cache = RenderCache(cache_size) if cache_size else None
+        self.sources = {}  # 模板依赖的文件 {路径: ((修改时间, 大小), 内容哈希)}，用于发现模板修改
         self._load_template()
 
     def _load_template(self):
-        """加载 Word 模板"""
+        """加载模板"""
         try:
-            logger.info(f"正在加载 Word 模板: {self.template_path}")
-            self.document = Document(self.template_path)
+            # 先记录文件状态再加载，加载期间文件被修改时下一次检查仍能发现
+            sources = {path: _snapshot_file(path) for path in (self.template_path, BUILTIN_TEMPLATE)}
+            if self.template_path.lower().endswith(HTML_EXTENSIONS):
+                logger.info(f"正在加载 HTML 模板: {self.template_path}")
+                self._load_html_template(self.template_path)
+            else:
+                logger.info(f"正在加载 Word 模板: {self.template_path}")
+                self._load_docx_template()
+            if self.jinja_template is None:
+                logger.info("模板中没有占位符，使用内置工资条模板")
+                self.compiled = self._get_compiled(BUILTIN_TEMPLATE)
+                self.fields = self.compiled.fields
+            else:
+                # 没有用到内置模板，不必监视
+                del sources[BUILTIN_TEMPLATE]
+            self.sources = sources
+            self.version += 1
+            self.invalidate_cache()
             logger.info("模板加载成功")
         except Exception as e:
-            logger.error(f"加载 Word 模板失败: {e}")
+            logger.error(f"加载模板失败: {e}")
+            raise
+
+    def _load_html_template(self, path):
+        """用 Jinja2 编译 HTML 模板（编译结果缓存在磁盘上，模板文件修改后自动重新编译）"""
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        template, fields = load_template(path, source)
+        if fields:
+            self.jinja_template = template
+            self.jinja_source = (path, source)
+            self.fields = fields
+
+    def _load_docx_template(self):
+        """将 Word 模板转换为 HTML 模板并用 Jinja2 编译
+
+        转换结果按 Word 文件内容的哈希缓存为 HTML 文件，Jinja2 编译结果也缓存在磁盘上，
+        同一模板只在第一次加载时转换和编译
+        """
+        with open(self.template_path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=20)
+        digest.update(f"converter-{DocxConverter.CONVERTER_VERSION}".encode())
+        name = digest.hexdigest() + '.html'
+        get_jinja_env()  # 确保缓存目录存在
+        path = os.path.join(TEMPLATE_CACHE_DIR, name)
+
+        if os.path.exists(path):
+            logger.info(f"命中 Word 模板转换缓存: {name}")
+        else:
+            source = DocxConverter(ExcelReader.FIELD_MAPPING).convert(self.template_path)
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(source)
+            os.replace(temp_path, path)
+            logger.info(f"Word 模板已转换为 HTML 模板: {name}")
+
+        self._load_html_template(path)
+
+    @classmethod
+    def _get_compiled(cls, path):
+        """获取编译后的模板（每个模板文件只编译一次，文件修改后重新编译）"""
+        mtime = os.stat(path).st_mtime_ns
+        entry = cls._compiled.get(path)
+        if entry is None or entry[0] != mtime:
+            entry = cls._compiled[path] = (mtime, CompiledTemplate.from_file(path))
+        return entry[1]
+
+    @classmethod
+    def _from_spec(cls, spec):
+        """按主进程处理器的模板创建处理器（子进程中使用，不读取模板文件，不缓存渲染结果）
+
+        Args:
+            spec: TemplateHandler._worker_spec() 的返回值
+        """
+        handler = cls.__new__(cls)
+        handler.template_path, handler.fields, handler.compiled, handler.jinja_source = spec
+        handler.jinja_template = load_template(*handler.jinja_source)[0] if handler.jinja_source else None
+        handler.version = 0
+        handler.render_cache = None
+        handler.sources = {}
+        return handler
+
+    def _worker_spec(self):
+        """交给子进程的模板：已编译的内置模板或 Jinja2 模板源码
+
+        子进程按这份源码编译，与当前处理器使用的模板完全一致，
+        发送期间模板文件被修改或保存到一半都不影响本次发送
+        """
+        return self.template_path, self.fields, self.compiled, self.jinja_source
+
+    def is_stale(self):
+        """快速检查模板文件是否可能已修改（只比较修改时间和大小，可在界面线程中定时调用）"""
+        return any(_file_stat(path) != stat for path, (stat, _) in self.sources.items())
+
+    def reload(self):
+        """模板文件修改后重新加载
+
+        在新的处理器中重新编译，调用方把引用整体替换为新处理器，
+        正在进行的渲染和发送继续使用旧处理器，不会读到一半新一半旧的模板；
+        新处理器的渲染缓存是空的，其他模板的缓存不受影响
+
+        Returns:
+            新的 TemplateHandler；文件只是被重新保存、内容没有变化时返回 None
+        """
+        sources = {path: _snapshot_file(path) for path in self.sources}
+        if all(sources[path][1] == digest for path, (_, digest) in self.sources.items()):
+            self.sources = sources
+            return None
+        try:
+            handler = TemplateHandler(self.template_path, self.render_cache.max_size if self.render_cache else 0)
+        except Exception:
+            # 模板保存到一半或有语法错误时继续使用旧模板，等下一次修改再重新加载
+            self.sources = sources
             raise
+        handler.version = self.version + 1
+        logger.info(f"模板已重新加载: {self.template_path}")
+        return handler
 
     def render_to_html(self, employee_data, config):
         """渲染模板为 HTML
@@ -65,304 +298,204 @@ class TemplateHandler:
             config: 模板配置（签名、公司名等）
 
         Returns:
-            HTML 格式的邮件内容
+            UTF-8 编码的 HTML 字节串，可直接作为邮件正文
         """
         try:
-            # 准备模板变量
+            key = self._cache_key(employee_data, config)
+            if key is not None:
+                html = self.render_cache.get(key)
+                if html is not None:
+                    return html
+
+            # 只准备模板引用到的字段
             template_vars = self._prepare_vars(employee_data, config)
 
-            # 生成 HTML 内容
-            html_content = self._generate_html_from_template(template_vars)
+            if self.jinja_template is not None:
+                html = self.jinja_template.render(template_vars).encode('utf-8')
+            else:
+                # 按预先编译的片段拼接 HTML
+                html = self.compiled.render(template_vars)
 
-            return html_content
+            if key is not None:
+                self.render_cache.put(key, html)
+            return html
 
         except Exception as e:
             logger.error(f"渲染模板失败: {e}")
             raise
 
+    def _cache_key(self, employee_data, config):
+        """渲染缓存键：模板版本 + 签名/公司名 + 模板引用到的员工字段值
+
+        直接用字段值组成的元组作为键（字典查找时再计算哈希），
+        不同员工的数据不会因哈希碰撞而混用；不缓存时返回 None
+        """
+        if self.render_cache is None:
+            return None
+        get = employee_data.get
+        key = (self.version, config.get('email_sign'), config.get('company_name'),
+               *[get(field) for field in self.fields])
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def invalidate_cache(self):
+        """清空渲染缓存（重新加载模板、修改员工数据后调用）"""
+        if self.render_cache is not None:
+            self.render_cache.clear()
+
+    def render_many(self, employees, config, chunk_size=RENDER_CHUNK_SIZE, workers=None):
+        """批量渲染，按输入顺序逐个产出结果
+
+        员工按块分给多个子进程渲染，同时在途的块数有上限，
+        employees 可以是迭代器（如流式模式的 ExcelReader），不会一次性全部读入内存；
+        命中渲染缓存的员工直接使用缓存，子进程渲染的结果也写入缓存；
+        子进程使用与当前处理器相同的模板源码，渲染期间模板文件被修改不影响结果；
+        数量不足一块或只用一个进程时直接在当前进程渲染
+
+        Args:
+            employees: 员工数据的可迭代对象
+            config: 模板配置（签名、公司名等）
+            chunk_size: 每块员工数
+            workers: 子进程数，默认 CPU 核数
+
+        Yields:
+            (员工数据, HTML 字节串)；单个员工渲染失败时第二项为异常对象，不影响其他员工
+        """
+        workers = workers or os.cpu_count() or 1
+        iterator = iter(employees)
+        first = list(islice(iterator, chunk_size))
+        if workers == 1 or len(first) < chunk_size:
+            for employee_data in first:
+                yield employee_data, self._render_safe(employee_data, config)
+            for employee_data in iterator:
+                yield employee_data, self._render_safe(employee_data, config)
+            return
+
+        logger.info(f"批量渲染：{workers} 个进程，每块 {chunk_size} 人")
+        spec = self._worker_spec()
+        executor = ProcessPoolExecutor(max_workers=workers)
+        pending = deque()  # [(员工块, 缓存键, 已缓存的 HTML, Future), ...]
+
+        def submit(chunk):
+            # 命中渲染缓存的员工不再交给子进程
+            keys = [self._cache_key(employee_data, config) for employee_data in chunk]
+            cached = [None if key is None else self.render_cache.get(key) for key in keys]
+            misses = [employee_data for employee_data, html in zip(chunk, cached) if html is None]
+            future = executor.submit(_render_chunk, (spec, misses, config)) if misses else None
+            pending.append((chunk, keys, cached, future))
+
+        try:
+            chunk = first
+            while chunk or pending:
+                # 保持每个进程两块在途，其余员工留在迭代器中
+                while chunk and len(pending) < workers * 2:
+                    submit(chunk)
+                    chunk = list(islice(iterator, chunk_size))
+                done_chunk, keys, cached, future = pending.popleft()
+                rendered = iter(())
+                if future is not None:
+                    try:
+                        rendered = iter(future.result())
+                    except Exception as e:
+                        # 子进程异常退出等：这一块改在当前进程渲染，不中断整批
+                        logger.warning(f"子进程渲染失败，改在当前进程渲染: {e}")
+                        rendered = (self._render_safe(employee_data, config)
+                                    for employee_data, html in zip(done_chunk, cached) if html is None)
+                for employee_data, key, html in zip(done_chunk, keys, cached):
+                    if html is None:
+                        html = next(rendered)
+                        if key is not None and not isinstance(html, Exception):
+                            self.render_cache.put(key, html)
+                    yield employee_data, html
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _render_safe(self, employee_data, config):
+        """渲染单个员工，失败时返回异常对象"""
+        try:
+            return self.render_to_html(employee_data, config)
+        except Exception as e:
+            return e
+
     def _prepare_vars(self, employee_data, config):
         """准备模板变量
 
+        只取模板引用到的字段（编译时从模板中分析得到），不复制、不处理其余员工数据
+
         Args:
-            employee_data: 员工数据
+            employee_data: 员工数据（字典或 Employee 记录）
             config: 配置信息
 
         Returns:
-            模板变量字典
+            {字段: 显示值}
         """
-        vars_data = employee_data.copy()
-
-        # 处理空值，显示为0或空字符串
-        for key, value in vars_data.items():
-            if value == '' or value is None:
-                if key in ['base_salary', 'performance_salary', 'service_bonus', 'commission',
-                          'live_salary', 'pre_tax_salary', 'social_security', 'housing_fund',
-                          'current_tax', 'total_deduction', 'net_salary']:
-                    vars_data[key] = '0'
-                else:
-                    vars_data[key] = ''
-
-        # 添加签名和公司名
-        vars_data['email_sign'] = config.get('email_sign', 'smart')
-        vars_data['company_name'] = config.get('company_name', 'United Field')
-
-        return vars_data
+        template_vars = TemplateVars(employee_data, {
+            # 添加签名和公司名
+            'email_sign': config.get('email_sign', 'smart'),
+            'company_name': config.get('company_name', 'United Field'),
+        })
+        get = template_vars.get
+        return {field: get(field, '') for field in self.fields}
 
-    def _generate_html_from_template(self, template_vars):
-        """从模板变量生成 HTML 内容
+    def missing_fields(self, available):
+        """模板引用了、但数据中没有的字段
 
         Args:
-            template_vars: 模板变量字典
+            available: 数据中的字段集合（如 ExcelReader.get_fields()）
 
         Returns:
-            HTML 格式内容
+            缺少的字段元组（按模板中的顺序）
         """
-        # 创建 HTML 模板 - 温馨米色调
-        html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <style>
-        body {{
-            font-family: "Microsoft YaHei UI", "微软雅黑", "SimSun", "宋体", Arial, sans-serif;
-            font-size: 15px;
-            line-height: 1.9;
-            color: #5D4E37;
-            padding: 25px;
-            max-width: 680px;
-            margin: 0 auto;
-            background: linear-gradient(to bottom, #FFF8F0 0%, #FDF6EC 100%);
-        }}
-        /* 温馨卡片容器 */
-        .card {{
-            background: #FFFEFA;
-            border-radius: 12px;
-            padding: 30px;
-            box-shadow: 0 2px 12px rgba(212, 165, 116, 0.15);
-            border: 1px solid #F5E6D3;
-        }}
-        /* 问候语 */
-        .greeting {{
-            margin-bottom: 12px;
-            color: #8B7355;
-            font-size: 16px;
-        }}
-        /* 温馨提示条 */
-        .warm-tip {{
-            background: linear-gradient(to right, #FFF4E6, #FFFAF5);
-            border-left: 4px solid #D4A574;
-            padding: 12px 15px;
-            margin: 15px 0;
-            border-radius: 0 8px 8px 0;
-            color: #8B7355;
-            font-size: 14px;
-        }}
-        /* 标题 */
-        .title {{
-            font-size: 18px;
-            font-weight: bold;
-            margin: 20px 0 12px 0;
-            padding-bottom: 8px;
-            color: #5D4E37;
-            border-bottom: 2px solid #E8D4C4;
-        }}
-        /* 信息行 */
-        .info-row {{
-            margin: 10px 0;
-            color: #5D4E37;
-        }}
-        /* 分区标题 */
-        .section-title {{
-            font-weight: bold;
-            margin-top: 22px;
-            margin-bottom: 10px;
-            color: #8B7355;
-            font-size: 15px;
-        }}
-        /* 工资表格 */
-        .salary-table {{
-            border-collapse: collapse;
-            width: 100%;
-            margin: 12px 0;
-            border-radius: 8px;
-            overflow: hidden;
-            box-shadow: 0 1px 4px rgba(212, 165, 116, 0.1);
-        }}
-        .salary-table td {{
-            border: 1px solid #E8D4C4;
-            padding: 10px 14px;
-            text-align: left;
-            background: #FFFEFA;
-        }}
-        .salary-table .header td {{
-            background: linear-gradient(to bottom, #F5E6D3, #EBDCCF);
-            font-weight: bold;
-            text-align: center;
-            color: #5D4E37;
-        }}
-        .salary-table tr:nth-child(even) td:not(.header) {{
-            background: #FDFBF7;
-        }}
-        .salary-table td:first-child {{
-            width: 25%;
-            color: #8B7355;
-        }}
-        .salary-table td:nth-child(2) {{
-            width: 25%;
-        }}
-        /* 备注区域 */
-        .remarks {{
-            margin-top: 18px;
-            padding: 15px;
-            background: #FFFAF5;
-            border-radius: 8px;
-            font-size: 13px;
-            color: #8B7355;
-            border: 1px dashed #E8D4C4;
-        }}
-        .remarks p {{
-            margin: 6px 0;
-            line-height: 1.7;
-        }}
-        /* 底部 */
-        .footer {{
-            margin-top: 25px;
-            padding-top: 15px;
-            color: #A89583;
-            border-top: 1px solid #E8D4C4;
-            text-align: right;
-        }}
-        .footer p {{
-            margin: 5px 0;
-        }}
-        /* 下划线样式 */
-        .underline {{
-            text-decoration: underline;
-            text-decoration-style: solid;
-            text-decoration-color: #D4A574;
-            text-decoration-thickness: 1.5px;
-            padding-bottom: 1px;
-        }}
-        /* 数值高亮 */
-        .value {{
-            font-weight: 500;
-            color: #8B7355;
-        }}
-        /* 金额强调 */
-        .amount {{
-            font-weight: 600;
-            color: #D4A574;
-            font-family: "Arial", sans-serif;
-        }}
-        /* 薪草装饰 */
-        .decoration {{
-            text-align: center;
-            color: #E8D4C4;
-            font-size: 24px;
-            margin: 10px 0;
-        }}
-    </style>
-</head>
-<body>
-    <div class="card">
-        <div class="decoration">🌸 🍃 🌸</div>
-
-        <div class="greeting">
-            亲爱的 <strong class="value">{template_vars.get('name', '')}</strong>：
-        </div>
-
-        <div class="warm-tip">
-            💕 温馨提示：以下是你 <strong>{template_vars.get('pay_month', '')}</strong> 的工资明细，请仔细查阅哦~
-        </div>
-
-        <div class="title">📋 工资条</div>
-
-        <div class="info-row">
-            员工姓名：<span class="value">{template_vars.get('name', '')}</span>　　　　发放月份：<span class="value">{template_vars.get('pay_month', '')}</span>
-        </div>
-        <div class="info-row">
-            应出勤天数：<span class="value">{template_vars.get('expected_days', '')}</span> 天　　　实际出勤天数：<span class="value">{template_vars.get('actual_days', '')}</span> 天
-        </div>
-
-        <div class="section-title">💰 一、收入明细</div>
-        <table class="salary-table">
-            <tr class="header">
-                <td>项目</td>
-                <td>金额（元）</td>
-                <td>项目</td>
-                <td>金额（元）</td>
-            </tr>
-            <tr>
-                <td>基本工资</td>
-                <td><span class="amount underline">{template_vars.get('base_salary', '0')}</span></td>
-                <td>绩效工资</td>
-                <td><span class="amount underline">{template_vars.get('performance_salary', '0')}</span></td>
-            </tr>
-            <tr>
-                <td>奖金</td>
-                <td><span class="amount underline">{template_vars.get('service_bonus', '0')}</span></td>
-                <td>提成</td>
-                <td><span class="amount underline">{template_vars.get('commission', '0')}</span></td>
-            </tr>
-            <tr>
-                <td>加班工资</td>
-                <td><span class="amount underline">{template_vars.get('live_salary', '0')}</span></td>
-                <td>其他补贴</td>
-                <td><span class="amount">0</span></td>
-            </tr>
-        </table>
-
-        <div class="info-row" style="margin-top: 12px;">
-            <strong>应发合计：</strong><span class="amount" style="font-size: 18px; color: #C7956A;">{template_vars.get('pre_tax_salary', '0')}</span> 元
-        </div>
-
-        <div class="section-title">📝 二、扣款明细</div>
-        <table class="salary-table">
-            <tr class="header">
-                <td>项目</td>
-                <td>金额（元）</td>
-                <td>项目</td>
-                <td>金额（元）</td>
-            </tr>
-            <tr>
-                <td>社保个人部分</td>
-                <td><span class="amount underline">{template_vars.get('social_security', '0')}</span></td>
-                <td>公积金个人部分</td>
-                <td><span class="amount underline">{template_vars.get('housing_fund', '0')}</span></td>
-            </tr>
-            <tr>
-                <td>个人所得税</td>
-                <td><span class="amount underline">{template_vars.get('current_tax', '0')}</span></td>
-                <td>其他扣款</td>
-                <td><span class="amount">0</span></td>
-            </tr>
-        </table>
-
-        <div class="info-row" style="margin-top: 12px;">
-            <strong>扣款合计：</strong><span class="amount underline">{template_vars.get('total_deduction', '0')}</span> 元
-        </div>
-
-        <div class="section-title">🎁 三、实发工资</div>
-        <div class="info-row" style="background: linear-gradient(to right, #FFF4E6, #FFFAF5); padding: 12px; border-radius: 8px;">
-            <strong style="color: #8B7355;">实发金额：</strong><span class="amount" style="font-size: 20px; color: #C7956A;">{template_vars.get('net_salary', '0')}</span> <strong>元</strong>
-        </div>
-
-        <div class="section-title">📌 四、备注</div>
-        <div class="remarks">
-            <p>💡 <strong>温馨提示：</strong></p>
-            <p>1. 如对工资有疑问，请随时与 HR 联系沟通~</p>
-            <p>2. 工资将通过银行转账发放，请注意查收 💰</p>
-            <p>3. 工资条属于个人隐私信息，请务必妥善保管 🤫</p>
-        </div>
-
-        <div class="decoration">🍂 🌿 🍂</div>
-
-        <div class="footer">
-            <p>祝您工作愉快，生活美满！✨</p>
-            <p style="margin-top: 8px; color: #8B7355;">—— {template_vars.get('email_sign', 'smart')}</p>
-            <p style="font-size: 13px; color: #A89583;">人力资源部</p>
-        </div>
-    </div>
-</body>
-</html>"""
-        return html
+        return tuple(field for field in self.fields if field not in available and field not in self.CONFIG_FIELDS)
+
+
+def _file_stat(path):
+    """文件的 (修改时间, 大小)，文件不存在（如编辑器保存过程中）时为 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _snapshot_file(path):
+    """文件的 ((修改时间, 大小), 内容哈希)"""
+    stat = _file_stat(path)
+    try:
+        with open(path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=20).hexdigest()
+    except OSError:
+        digest = None
+    return stat, digest
+
+
+def _render_chunk(task):
+    """在子进程中渲染一块员工
+
+    子进程按主进程处理器的模板源码创建处理器（不读取模板文件、不缓存渲染结果），
+    Jinja2 编译结果从磁盘缓存加载
+
+    Args:
+        task: (TemplateHandler._worker_spec(), 员工数据列表, 模板配置)
+
+    Returns:
+        HTML 字节串列表（渲染失败的位置为异常对象）
+    """
+    spec, chunk, config = task
+    try:
+        handler = TemplateHandler._from_spec(spec)
+    except Exception as e:
+        # 模板无法编译时这一块员工都记为失败，不影响其他员工
+        error = RuntimeError(f"加载模板失败: {e}")
+        return [error] * len(chunk)
+    results = []
+    for employee_data in chunk:
+        result = handler._render_safe(employee_data, config)
+        if isinstance(result, Exception):
+            # 异常对象未必能序列化回主进程
+            result = RuntimeError(str(result))
+        results.append(result)
+    return results
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+模板注册表模块
+
+按员工数据中某一列的值（如部门、所属公司）选择不同的工资条模板，
+未登记的值使用默认模板。编译好的模板处理器保存在有上限的 LRU 中，
+发送前按模板分组，同一模板的员工连续渲染
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from itertools import groupby
+from core.excel_reader import ExcelReader
+from core.template_handler import TemplateHandler
+from utils.logger import logger
+
+
+# 同时保留的已编译模板数（不含默认模板）
+TEMPLATE_LRU_SIZE = 8
+
+
+class TemplateRegistry:
+    """模板注册表：列值 -> 模板路径"""
+
+    def __init__(self, column='', mapping=None, max_size=TEMPLATE_LRU_SIZE):
+        """初始化注册表
+
+        Args:
+            column: 选择模板的 Excel 列名（如 "部门"），为空时所有员工都使用默认模板
+            mapping: {列值: 模板路径}，列值不区分大小写
+            max_size: 同时保留的已编译模板数
+        """
+        # 不在 FIELD_MAPPING 中的列以原表头作为字段名
+        self.column = ExcelReader.FIELD_MAPPING.get(column, column) if column else ''
+        self.mapping = {}
+        for value, path in (mapping or {}).items():
+            if not os.path.exists(path):
+                logger.warning(f"模板不存在，{column}={value} 将使用默认模板: {path}")
+                continue
+            self.mapping[self._normalize(value)] = path
+        self.max_size = max_size
+        self.default_handler = None
+        self._handlers = OrderedDict()  # {模板路径: TemplateHandler}
+        self._lock = threading.Lock()
+        if self.column and self.mapping:
+            logger.info(f"按'{column}'列选择模板，已登记 {len(self.mapping)} 个模板")
+
+    @staticmethod
+    def _normalize(value):
+        return str(value).strip().lower()
+
+    def set_default(self, handler):
+        """设置默认模板处理器（选择模板或模板重新加载后调用）"""
+        self.default_handler = handler
+
+    def template_for(self, employee_data):
+        """员工使用的模板路径"""
+        if self.column and self.mapping:
+            path = self.mapping.get(self._normalize(employee_data.get(self.column, '')))
+            if path is not None:
+                return path
+        return self.default_handler.template_path
+
+    def get_handler(self, path):
+        """获取模板处理器
+
+        默认模板直接返回；其他模板按最近使用保留，超出上限时淘汰最久未用的；
+        模板文件修改后重新加载
+
+        Args:
+            path: 模板路径
+
+        Returns:
+            TemplateHandler
+        """
+        default_handler = self.default_handler
+        if path == default_handler.template_path:
+            return default_handler
+
+        with self._lock:
+            handler = self._handlers.get(path)
+            if handler is not None and handler.is_stale():
+                handler = handler.reload() or handler
+            if handler is None:
+                handler = TemplateHandler(path)
+            self._handlers[path] = handler
+            self._handlers.move_to_end(path)
+            if len(self._handlers) > self.max_size:
+                evicted, _ = self._handlers.popitem(last=False)
+                logger.info(f"释放已编译模板: {evicted}")
+        return handler
+
+    def handler_for(self, employee_data):
+        """员工使用的模板处理器"""
+        return self.get_handler(self.template_for(employee_data))
+
+    def group_by_template(self, employees):
+        """按模板分组排列员工（组按首次出现的顺序，组内保持原顺序）
+
+        Args:
+            employees: 员工列表
+
+        Returns:
+            重新排列后的员工列表
+        """
+        if not (self.column and self.mapping):
+            return list(employees)
+        groups = OrderedDict()
+        for employee_data in employees:
+            groups.setdefault(self.template_for(employee_data), []).append(employee_data)
+        if len(groups) > 1:
+            logger.info(f"按模板分组：{len(groups)} 个模板")
+        return [employee_data for group in groups.values() for employee_data in group]
+
+    def missing_fields(self, available, employees):
+        """检查这些员工用到的每个模板是否引用了数据中没有的字段
+
+        Args:
+            available: 数据中的字段集合（如 ExcelReader.get_fields()）
+            employees: 待发送的员工
+
+        Returns:
+            {模板路径: 缺少的字段元组}，没有缺少时为空字典
+        """
+        paths = dict.fromkeys(self.template_for(employee_data) for employee_data in employees)
+        missing = {}
+        for path in paths:
+            fields = self.get_handler(path).missing_fields(available)
+            if fields:
+                missing[path] = fields
+        return missing
+
+    def render_to_html(self, employee_data, config):
+        """用员工对应的模板渲染 HTML"""
+        return self.handler_for(employee_data).render_to_html(employee_data, config)
+
+    def render_many(self, employees, config, **kwargs):
+        """批量渲染，按输入顺序逐个产出 (员工数据, HTML 字节串)
+
+        连续使用同一模板的员工交给该模板的 render_many 一起渲染，
+        先用 group_by_template 排列可让每个模板只切换一次
+        """
+        for path, group in groupby(employees, key=self.template_for):
+            yield from self.get_handler(path).render_many(group, config, **kwargs)
+
+    def invalidate_cache(self):
+        """清空所有模板的渲染缓存"""
+        self.default_handler.invalidate_cache()
+        with self._lock:
+            for handler in self._handlers.values():
+                handler.invalidate_cache()
@@ -11,13 +11,19 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
 import os
+import re
 import tempfile
 import webbrowser
 from utils.config import Config
 from utils.logger import logger
 from core.excel_reader import ExcelReader
-from core.template_handler import TemplateHandler
-from core.email_sender import EmailBatchSender
+from core.excel_cache import ExcelCache
+from core.payroll_validator import PayrollValidator
+from core.template_handler import TemplateHandler, BUILTIN_TEMPLATE
+from core.template_env import precompile_templates
+from core.template_registry import TemplateRegistry
+from core.email_sender import EmailBatchSender, CertificateError
+from core.send_scheduler import SendSchedule, ScheduledJob, SendQueue
 from gui.preview_window import PreviewWindow
 from gui.settings_dialog import SettingsDialog
 from datetime import datetime
@@ -71,6 +77,12 @@ class Styles:
 class MainWindow(tk.Tk):
     """主窗口"""
 
+    # 后台加载 Excel 时每批推送到界面的行数
+    LOAD_CHUNK_SIZE = 500
+
+    # 检查模板文件是否修改的间隔（毫秒）
+    TEMPLATE_WATCH_INTERVAL = 300
+
     def __init__(self):
         super().__init__()
         self.title("✨ smartMail - 工资条邮件群发工具")
@@ -89,10 +101,14 @@ class MainWindow(tk.Tk):
 
         # 数据
         self.excel_reader = None
+        self.validation_report = None
         self.template_handler = None
+        self.template_registry = TemplateRegistry(*self.app_config.get_template_map())
         self.employee_data = []
         self.preview_data = []
         self.batch_sender = None
+        self.send_queue = SendQueue()
+        self.excel_cache = ExcelCache(max_size_mb=self.settings['cache_size_mb'])
         self.current_html = ""
         self.current_employee = None
         self.html_frame = None
@@ -129,6 +145,15 @@ class MainWindow(tk.Tk):
 
         # 当前预览索引
         self.current_preview_index = 0
+        self.preview_index_by_id = {}  # {行 ID: preview_data 中的位置}
+        self.loaded_excel_paths = []
+
+        # 后台加载 Excel：每次加载递增代号，过期批次直接丢弃
+        self._load_generation = 0
+        self._load_cancel = None
+
+        # 模板修改后在后台重新加载
+        self._template_reloading = False
 
         # 设置样式
         self._setup_styles()
@@ -137,12 +162,25 @@ class MainWindow(tk.Tk):
         self._create_menu()
         self._create_ui()
 
+        # 后台预编译内置模板目录和上次模板所在目录中的 HTML 模板
+        threading.Thread(
+            target=precompile_templates,
+            args=(os.path.dirname(BUILTIN_TEMPLATE), os.path.dirname(self.template_path.get())),
+            daemon=True,
+        ).start()
+
         # 加载上次文件
-        if self.excel_path.get() and os.path.exists(self.excel_path.get()):
+        if self._get_excel_paths():
             self._load_excel()
         if self.template_path.get() and os.path.exists(self.template_path.get()):
             self._load_template()
 
+        # 检查未完成的定时发送任务
+        self.after(500, self._check_pending_jobs)
+
+        # 监视模板文件，修改后自动刷新预览
+        self.after(self.TEMPLATE_WATCH_INTERVAL, self._watch_template)
+
     def _setup_styles(self):
         """设置界面样式"""
         style = ttk.Style()
@@ -247,6 +285,10 @@ class MainWindow(tk.Tk):
         # 文件菜单
         file_menu = tk.Menu(menubar, tearoff=False)
         menubar.add_cascade(label="文件", menu=file_menu)
+        file_menu.add_command(label="重新加载 Excel", command=self._reload_excel, accelerator="F5")
+        file_menu.add_command(label="数据校验报告", command=self._show_validation_report)
+        file_menu.add_command(label="导出全部工资条", command=self._export_all_payslips)
+        file_menu.add_separator()
         file_menu.add_command(label="退出", command=self.quit)
 
         # 设置菜单
@@ -260,6 +302,8 @@ class MainWindow(tk.Tk):
         menubar.add_cascade(label="帮助", menu=help_menu)
         help_menu.add_command(label="关于", command=self._show_about)
 
+        self.bind('<F5>', lambda event: self._reload_excel())
+
     def _create_ui(self):
         """创建主界面"""
         # 主容器 - 使用灰色背景
@@ -400,6 +444,9 @@ class MainWindow(tk.Tk):
         tk.Button(row1, text="📂 浏览", command=self._select_excel,
                  bg=Styles.PRIMARY_COLOR, fg='white', font=('Microsoft YaHei UI', 9),
                  relief='flat', cursor='hand2', padx=12, pady=4, borderwidth=0).pack(side=tk.LEFT)
+        tk.Button(row1, text="🔄 重新加载", command=self._reload_excel,
+                 bg=Styles.SECONDARY_COLOR, fg=Styles.TEXT_COLOR, font=('Microsoft YaHei UI', 9),
+                 relief='flat', cursor='hand2', padx=12, pady=4, borderwidth=0).pack(side=tk.LEFT, padx=(8, 0))
 
         # 模板文件
         row2 = tk.Frame(content_frame, bg=Styles.CARD_BG)
@@ -650,6 +697,23 @@ class MainWindow(tk.Tk):
         )
         self.stop_btn.pack(side=tk.LEFT, padx=(0, 10))
 
+        # 定时发送按钮
+        self.schedule_btn = tk.Button(
+            btn_row,
+            text="⏰ 定时发送",
+            command=self._start_scheduled_send,
+            bg=Styles.PRIMARY_COLOR,
+            fg='white',
+            font=('Microsoft YaHei UI', 9),
+            relief='flat',
+            cursor='hand2',
+            padx=15,
+            pady=8,
+            borderwidth=0,
+            activebackground=Styles.ACCENT_COLOR
+        )
+        self.schedule_btn.pack(side=tk.LEFT, padx=(0, 10))
+
         # 导出按钮
         export_btn = tk.Button(
             btn_row,
@@ -721,6 +785,10 @@ class MainWindow(tk.Tk):
 
     def _edit_pay_month(self):
         """编辑发放月份"""
+        if self._is_loading():
+            messagebox.showinfo("提示", "Excel 正在加载，请稍候")
+            return
+
         if not self.employee_data:
             messagebox.showinfo("提示", "请先加载Excel文件")
             return
@@ -739,6 +807,8 @@ class MainWindow(tk.Tk):
             # 更新所有员工的发放月份
             for emp in self.employee_data:
                 emp['pay_month'] = new_month
+            if self.template_handler:
+                self.template_registry.invalidate_cache()
 
             # 更新显示
             self.pay_month_display.set(new_month)
@@ -753,49 +823,272 @@ class MainWindow(tk.Tk):
     # ==================== 文件操作 ====================
 
     def _select_excel(self):
-        path = filedialog.askopenfilename(title="选择 Excel 文件", filetypes=[("Excel 文件", "*.xls *.xlsx")])
-        if path:
+        paths = filedialog.askopenfilenames(title="选择 Excel 文件（可多选）", filetypes=[
+            ("工资数据", "*.xls *.xlsx *.csv *.tsv *.txt *.parquet"),
+            ("Excel 文件", "*.xls *.xlsx"),
+            ("CSV 文件", "*.csv *.tsv *.txt"),
+            ("所有文件", "*.*"),
+        ])
+        if paths:
+            path = ';'.join(paths)
             self.excel_path.set(path)
             self.app_config.set('LastFiles', 'last_excel', path)
             self._load_excel()
 
+    def _get_excel_paths(self):
+        """获取已选择的 Excel 文件列表（多个文件以分号分隔）"""
+        return [p for p in self.excel_path.get().split(';') if p]
+
     def _select_template(self):
-        path = filedialog.askopenfilename(title="选择 Word 模板", filetypes=[("Word 文档", "*.docx")])
+        path = filedialog.askopenfilename(title="选择模板", filetypes=[
+            ("模板文件", "*.docx *.html *.htm"),
+            ("Word 文档", "*.docx"),
+            ("HTML 模板", "*.html *.htm"),
+        ])
         if path:
             self.template_path.set(path)
             self.app_config.set('LastFiles', 'last_template', path)
             self._load_template()
 
     def _load_excel(self):
-        try:
-            path = self.excel_path.get()
-            if not path or not os.path.exists(path):
-                return
+        """在后台线程中加载 Excel，分批把数据推送到界面
 
-            logger.info(f"正在加载 Excel: {path}")
-            self.excel_reader = ExcelReader(path)
-            self.employee_data = self.excel_reader.get_data()
-            self.preview_data = self.excel_reader.get_preview_data(self.settings['preview_count'])
+        重新选择文件时取消正在进行的加载
+        """
+        paths = self._get_excel_paths()
+        if not paths or not all(os.path.exists(p) for p in paths):
+            return
 
-            # 更新发放月份显示
-            if self.employee_data:
-                pay_month = self.employee_data[0].get('pay_month', '未知')
-                self.pay_month_display.set(pay_month)
+        # 取消上一次加载
+        if self._load_cancel is not None:
+            self._load_cancel.set()
+        self._load_generation += 1
+        self._load_cancel = threading.Event()
 
-            # 更新统计信息
-            self.stats_label.config(text=f"📊 共 {len(self.employee_data)} 人")
+        self.excel_reader = None
+        self.loaded_excel_paths = paths
+        self.employee_data = []
+        self.preview_data = []
+        self.validation_report = None
+        self.current_preview_index = 0
+        self._update_employee_list(self.preview_data)
+        self.count_label.config(text="0 人")
+        self.stats_label.config(text="⏳ 正在加载...")
+        self.progress_var.set(0)
+        self.progress_text.set("0/0")
+        self.status_text.set("正在加载 Excel...")
+
+        logger.info(f"正在加载 Excel: {paths}")
+        threading.Thread(
+            target=self._load_excel_thread,
+            args=(paths, self._load_generation, self._load_cancel),
+            daemon=True
+        ).start()
+
+    def _is_loading(self):
+        """Excel 是否正在后台加载"""
+        return self._load_cancel is not None and not self._load_cancel.is_set() and self.excel_reader is None
+
+    def _load_excel_thread(self, paths, generation, cancel):
+        """后台加载线程：解析数据并通过 after() 交给主线程显示"""
+        reader = None
+        try:
+            reader = ExcelReader(
+                paths if len(paths) > 1 else paths[0],
+                cache=self.excel_cache,
+                sheets='all' if self.settings['load_all_sheets'] else None,
+                deferred=True
+            )
+            total = reader.get_total_count()
+            loaded = 0
+            for chunk in reader.load_chunks(self.LOAD_CHUNK_SIZE):
+                if cancel.is_set():
+                    reader.close()
+                    logger.info("Excel 加载已取消")
+                    return
+                loaded += len(chunk)
+                self.after(0, self._on_load_chunk, generation, chunk, loaded, max(total, loaded))
+
+            report = self._make_validator().validate(reader.data)
+            if not cancel.is_set():
+                self.after(0, self._on_load_finished, generation, reader, report)
 
-            self._update_employee_list(self.preview_data)
-            self.count_label.config(text=f"{len(self.preview_data)}/{len(self.employee_data)}")
+        except Exception as e:
+            if reader is not None:
+                reader.close()
+            logger.error(f"加载 Excel 失败: {e}")
+            if not cancel.is_set():
+                self.after(0, self._on_load_failed, generation, e)
+
+    def _on_load_chunk(self, generation, chunk, loaded, total):
+        """收到一批新解析的数据：更新计数、进度，并尽早显示预览"""
+        if generation != self._load_generation:
+            return
 
-            if self.preview_data:
+        self.employee_data.extend(chunk)
+        self.progress_var.set(loaded / total * 100 if total else 0)
+        self.progress_text.set(f"{loaded}/{total}")
+        self.stats_label.config(text=f"⏳ 正在加载... 已读取 {loaded} 人")
+
+        # 预览列表未满时补充，第一批到达时显示第一封邮件预览
+        needed = self.settings['preview_count'] - len(self.preview_data)
+        if needed > 0:
+            first_batch = not self.preview_data
+            self._append_employee_rows(chunk[:needed])
+            if first_batch and self.preview_data:
+                self.pay_month_display.set(self.preview_data[0].get('pay_month', '未知'))
                 self._update_preview(self.preview_data[0])
+        self.count_label.config(text=f"{len(self.preview_data)}/{len(self.employee_data)}")
 
-            logger.info(f"Excel 加载成功，共 {len(self.employee_data)} 人")
+    def _on_load_finished(self, generation, reader, report):
+        """加载完成"""
+        if generation != self._load_generation:
+            return
 
-        except Exception as e:
-            messagebox.showerror("错误", f"加载 Excel 失败：\n{e}")
-            logger.error(f"加载 Excel 失败: {e}")
+        self.excel_reader = reader
+        self.employee_data = reader.get_data()
+        self.validation_report = report
+
+        self._update_stats()
+        self.progress_var.set(100 if self.employee_data else 0)
+        self.progress_text.set(f"{len(self.employee_data)}/{len(self.employee_data)}")
+        self.status_text.set("就绪 ✨")
+
+        logger.info(f"Excel 加载成功，共 {len(self.employee_data)} 人")
+
+        if self.excel_reader.duplicate_emails:
+            lines = [f"{email}: {', '.join(labels)}"
+                     for email, labels in list(self.excel_reader.duplicate_emails.items())[:10]]
+            messagebox.showwarning(
+                "邮箱重复",
+                f"发现 {len(self.excel_reader.duplicate_emails)} 个重复邮箱，请检查：\n\n" + "\n".join(lines)
+            )
+
+    def _update_stats(self):
+        """更新统计信息"""
+        stats_text = f"📊 共 {len(self.employee_data)} 人"
+        if self.validation_report and self.validation_report.has_issues:
+            stats_text += f"  ⚠ 数据问题 {len(self.validation_report.issues)} 个（文件 → 数据校验报告）"
+        self.stats_label.config(text=stats_text)
+        self.count_label.config(text=f"{len(self.preview_data)}/{len(self.employee_data)}")
+
+    def _reload_excel(self):
+        """重新读取当前 Excel，只更新有变化的员工，保留列表中的发送状态"""
+        if self._is_loading():
+            messagebox.showinfo("提示", "Excel 正在加载，请稍候")
+            return
+
+        paths = self._get_excel_paths()
+        if self.excel_reader is None or paths != self.loaded_excel_paths:
+            self._load_excel()
+            return
+        if not all(os.path.exists(p) for p in paths):
+            messagebox.showerror("错误", "Excel 文件不存在")
+            return
+
+        old_reader = self.excel_reader
+        generation = self._load_generation
+        self.status_text.set("正在重新加载 Excel...")
+        logger.info(f"正在重新加载 Excel: {paths}")
+
+        def reload_thread():
+            try:
+                reader = ExcelReader(
+                    paths if len(paths) > 1 else paths[0],
+                    cache=self.excel_cache,
+                    sheets='all' if self.settings['load_all_sheets'] else None
+                )
+                diff = old_reader.diff(reader)
+                self.after(0, self._on_reload_diff, generation, old_reader, diff)
+            except Exception as e:
+                logger.error(f"重新加载 Excel 失败: {e}")
+                self.after(0, self._on_reload_failed, e)
+
+        threading.Thread(target=reload_thread, daemon=True).start()
+
+    def _on_reload_diff(self, generation, reader, diff):
+        """应用重新加载的差异，只更新受影响的记录和列表行"""
+        if generation != self._load_generation or reader is not self.excel_reader:
+            return
+
+        reader.apply_diff(diff)
+        tree = self.employee_tree
+
+        # 删除的员工
+        if diff['removed']:
+            tree.delete(*[record['_row_id'] for record in diff['removed'] if tree.exists(record['_row_id'])])
+            removed = {id(record) for record in diff['removed']}
+            self.preview_data = [employee for employee in self.preview_data if id(employee) not in removed]
+            self.preview_index_by_id = {employee['_row_id']: idx for idx, employee in enumerate(self.preview_data)}
+            if self.current_employee is not None and id(self.current_employee) in removed:
+                self.current_employee = None
+                self.current_preview_index = 0
+
+        # 修改的员工：只改显示的字段，状态列保持不变
+        changed = set()
+        for record, _, fields in diff['changed']:
+            changed.add(id(record))
+            row_id = record['_row_id']
+            if tree.exists(row_id):
+                for field in ('name', 'email', 'pay_month'):
+                    if field in fields:
+                        tree.set(row_id, field, record.get(field, ''))
+
+        # 新增的员工追加到列表末尾
+        if diff['added']:
+            self._append_employee_rows(diff['added'])
+
+        if self.current_employee is None and self.preview_data:
+            self._update_preview(self.preview_data[0])
+        elif self.current_employee is not None and id(self.current_employee) in changed:
+            self._update_preview(self.current_employee)
+        if self.employee_data:
+            self.pay_month_display.set(self.employee_data[0].get('pay_month', '未知'))
+
+        self._update_stats()
+        self.status_text.set(
+            f"已重新加载：新增 {len(diff['added'])}，删除 {len(diff['removed'])}，修改 {len(diff['changed'])}"
+        )
+
+        # 后台重新校验
+        data = list(self.employee_data)
+
+        def validate_thread():
+            report = self._make_validator().validate(data)
+            self.after(0, self._on_revalidated, generation, report)
+
+        threading.Thread(target=validate_thread, daemon=True).start()
+
+    def _on_revalidated(self, generation, report):
+        """重新加载后的校验结果"""
+        if generation != self._load_generation:
+            return
+        self.validation_report = report
+        self._update_stats()
+
+    def _on_reload_failed(self, error):
+        """重新加载失败，保留已加载的数据"""
+        self.status_text.set("重新加载失败")
+        messagebox.showerror("错误", f"重新加载 Excel 失败：\n{error}")
+
+    def _on_load_failed(self, generation, error):
+        """加载失败"""
+        if generation != self._load_generation:
+            return
+        self._load_cancel.set()
+        # 丢弃已推送到界面的部分数据，与开始加载前一样回到空列表
+        self.employee_data = []
+        self.preview_data = []
+        self.current_employee = None
+        self.current_preview_index = 0
+        self._update_employee_list(self.preview_data)
+        self.preview_info.config(text="请选择员工")
+        self.count_label.config(text="0 人")
+        self.progress_var.set(0)
+        self.progress_text.set("0/0")
+        self.stats_label.config(text="📊 共 0 人")
+        self.status_text.set("加载失败")
+        messagebox.showerror("错误", f"加载 Excel 失败：\n{error}")
 
     def _load_template(self):
         try:
@@ -805,6 +1098,7 @@ class MainWindow(tk.Tk):
 
             logger.info(f"正在加载模板: {path}")
             self.template_handler = TemplateHandler(path)
+            self.template_registry.set_default(self.template_handler)
             logger.info("模板加载成功")
 
             if self.preview_data and self.current_preview_index < len(self.preview_data):
@@ -814,6 +1108,35 @@ class MainWindow(tk.Tk):
             messagebox.showerror("错误", f"加载模板失败：\n{e}")
             logger.error(f"加载模板失败: {e}")
 
+    def _watch_template(self):
+        """定时检查模板文件，修改后在后台重新编译"""
+        handler = self.template_handler
+        if handler is not None and not self._template_reloading and handler.is_stale():
+            self._template_reloading = True
+
+            def reload_thread():
+                try:
+                    new_handler = handler.reload()
+                except Exception as e:
+                    logger.warning(f"重新加载模板失败，继续使用修改前的模板: {e}")
+                    new_handler = None
+                self.after(0, self._on_template_reloaded, handler, new_handler)
+
+            threading.Thread(target=reload_thread, daemon=True).start()
+        self.after(self.TEMPLATE_WATCH_INTERVAL, self._watch_template)
+
+    def _on_template_reloaded(self, old_handler, new_handler):
+        """模板重新编译完成：整体替换模板处理器并刷新预览"""
+        self._template_reloading = False
+        # 期间用户已选择了其他模板
+        if new_handler is None or self.template_handler is not old_handler:
+            return
+        self.template_handler = new_handler
+        self.template_registry.set_default(new_handler)
+        self.status_text.set("模板已更新 ✨")
+        if self.current_employee:
+            self._update_preview(self.current_employee)
+
     def _load_more_employees(self):
         current_count = len(self.preview_data)
         more_count = self.settings['preview_count']
@@ -821,16 +1144,28 @@ class MainWindow(tk.Tk):
         new_data = self.employee_data[current_count:end_index]
 
         if new_data:
-            self.preview_data.extend(new_data)
-            self._update_employee_list(self.preview_data)
+            self._append_employee_rows(new_data)
             self.count_label.config(text=f"{len(self.preview_data)}/{len(self.employee_data)}")
 
     def _update_employee_list(self, data):
-        for item in self.employee_tree.get_children():
-            self.employee_tree.delete(item)
-
-        for employee in data:
-            self.employee_tree.insert('', tk.END, values=(
+        """刷新员工列表，Treeview 的 item ID 即员工的行 ID"""
+        self.employee_tree.delete(*self.employee_tree.get_children())
+
+        self.preview_index_by_id = {}
+        self._insert_employee_rows(data, 0)
+
+    def _append_employee_rows(self, employees):
+        """向预览列表末尾追加员工（加载过程中逐批追加）"""
+        start = len(self.preview_data)
+        self.preview_data.extend(employees)
+        self._insert_employee_rows(employees, start)
+
+    def _insert_employee_rows(self, employees, start):
+        """插入员工行并记录行 ID 在 preview_data 中的位置"""
+        for idx, employee in enumerate(employees, start=start):
+            row_id = employee['_row_id']
+            self.preview_index_by_id[row_id] = idx
+            self.employee_tree.insert('', tk.END, iid=row_id, values=(
                 '☑',
                 employee.get('name', ''),
                 employee.get('email', ''),
@@ -841,15 +1176,11 @@ class MainWindow(tk.Tk):
     def _on_employee_select(self, event):
         selection = self.employee_tree.selection()
         if selection:
-            item = selection[0]
-            values = self.employee_tree.item(item, 'values')
-            name = values[1]
-
-            for idx, emp in enumerate(self.preview_data):
-                if emp.get('name') == name:
-                    self.current_preview_index = idx
-                    self._update_preview(emp)
-                    break
+            row_id = selection[0]
+            idx = self.preview_index_by_id.get(row_id)
+            if idx is not None:
+                self.current_preview_index = idx
+                self._update_preview(self.preview_data[idx])
 
     def _toggle_select_all(self):
         items = self.employee_tree.get_children()
@@ -880,7 +1211,7 @@ class MainWindow(tk.Tk):
                 'email_sign': self.email_sign.get(),
                 'company_name': self.company_name.get()
             }
-            html_content = self.template_handler.render_to_html(employee, template_config)
+            html_content = self.template_registry.render_to_html(employee, template_config).decode('utf-8')
             self.current_html = html_content
 
             # 使用 HtmlFrame 显示 HTML
@@ -958,34 +1289,125 @@ class MainWindow(tk.Tk):
             except Exception as e:
                 messagebox.showerror("错误", f"导出失败：\n{e}")
 
+    def _export_all_payslips(self):
+        """把全部员工的工资条导出为 HTML 文件（多进程批量渲染）"""
+        if self._is_loading():
+            messagebox.showinfo("提示", "Excel 正在加载，请稍候")
+            return
+        if self.excel_reader is None or not self.employee_data:
+            messagebox.showerror("错误", "请先加载 Excel 文件")
+            return
+        if not self.template_handler:
+            messagebox.showerror("错误", "请先选择模板文件")
+            return
+
+        directory = filedialog.askdirectory(title="选择导出目录")
+        if not directory:
+            return
+
+        registry = self.template_registry
+        employees = registry.group_by_template(self.employee_data)
+        template_config = self._get_template_config()
+        total = len(employees)
+        self.status_text.set(f"正在导出工资条 0/{total}")
+
+        def export_thread():
+            failed = []
+            try:
+                for idx, (employee, html) in enumerate(registry.render_many(employees, template_config), start=1):
+                    if isinstance(html, Exception):
+                        failed.append(f"{employee.get('name', '')}: {html}")
+                    else:
+                        name = f"{idx:05d}_{employee.get('name', '')}_{employee.get('pay_month', '')}.html"
+                        with open(os.path.join(directory, re.sub(r'[\\/:*?"<>|\s]+', '_', name)), 'wb') as f:
+                            f.write(html)
+                    if idx % 500 == 0:
+                        self.after(0, self.status_text.set, f"正在导出工资条 {idx}/{total}")
+            except Exception as e:
+                logger.error(f"导出工资条失败: {e}")
+                self.after(0, messagebox.showerror, "错误", f"导出失败：\n{e}")
+                self.after(0, self.status_text.set, "导出失败")
+                return
+            self.after(0, self._on_export_all_done, directory, total, failed)
+
+        threading.Thread(target=export_thread, daemon=True).start()
+
+    def _on_export_all_done(self, directory, total, failed):
+        """全部工资条导出完成"""
+        logger.info(f"导出全部工资条: {directory}，共 {total} 份，失败 {len(failed)} 份")
+        self.status_text.set(f"已导出 {total - len(failed)} 份工资条")
+        if failed:
+            messagebox.showwarning("导出完成", f"已导出到：\n{directory}\n\n{len(failed)} 份渲染失败：\n" + "\n".join(failed[:10]))
+        else:
+            messagebox.showinfo("成功", f"已导出 {total} 份工资条到：\n{directory}")
+
     # ==================== 发送操作 ====================
 
-    def _start_send(self):
+    def _check_send_ready(self):
+        """发送前检查邮箱配置和模板"""
+        if self._is_loading():
+            messagebox.showinfo("提示", "Excel 正在加载，请稍候")
+            return False
+
         if not self.sender_email.get():
             messagebox.showerror("错误", "请输入邮箱账号")
-            return
+            return False
 
         if not self.email_password.get():
             messagebox.showerror("错误", "请输入邮箱密码")
-            return
+            return False
 
-        if not self.employee_data:
-            messagebox.showerror("错误", "请先加载 Excel 文件")
-            return
+        if not self.template_handler:
+            messagebox.showerror("错误", "请先选择 Word 模板文件")
+            return False
+
+        return True
+
+    def _make_validator(self):
+        """按系统设置创建数据校验器"""
+        return PayrollValidator(deduction_includes_tax=self.settings.get('deduction_includes_tax', False))
+
+    def _confirm_validation(self):
+        """数据校验有问题时，发送前让用户确认"""
+        if not self.validation_report or not self.validation_report.has_issues:
+            return True
+        return messagebox.askyesno(
+            "数据校验",
+            self.validation_report.summary_text(limit=10) + "\n\n数据存在以上问题，仍要继续发送吗？",
+            icon='warning'
+        )
 
-        selected_employees = self._get_selected_employees()
-        if not selected_employees:
-            messagebox.showwarning("提示", "请至少选择一个员工")
-            return
+    def _confirm_template_fields(self, employees):
+        """模板引用了 Excel 中没有的列时，发送前一次性列出并让用户确认"""
+        if not self.excel_reader:
+            return True
+        missing = self.template_registry.missing_fields(self.excel_reader.get_fields(), employees)
+        if not missing:
+            return True
+
+        headers = {field: header for header, field in ExcelReader.FIELD_MAPPING.items()}
+        lines = []
+        for path, fields in missing.items():
+            columns = '、'.join(headers.get(field, field) for field in fields)
+            lines.append(f"{os.path.basename(path)}：{columns}")
+        logger.warning(f"模板引用了 Excel 中没有的列: {'; '.join(lines)}")
+        return messagebox.askyesno(
+            "模板字段检查",
+            "模板中引用了 Excel 中没有的列：\n\n" + "\n".join(lines) +
+            "\n\n这些位置在邮件中将显示为空（金额显示为 0.00），仍要继续发送吗？",
+            icon='warning'
+        )
 
-        result = messagebox.askyesno("确认发送", f"确定要发送 {len(selected_employees)} 封邮件吗？")
-        if not result:
+    def _show_validation_report(self):
+        """显示数据校验报告"""
+        if not self.validation_report:
+            messagebox.showinfo("提示", "请先加载Excel文件")
             return
+        messagebox.showinfo("数据校验报告", self.validation_report.summary_text(limit=30))
 
-        self.send_btn.config(state=tk.DISABLED)
-        self.stop_btn.config(state=tk.NORMAL)
-
-        email_config = {
+    def _get_email_config(self):
+        """获取发送用的邮件配置"""
+        return {
             'sender_email': self.sender_email.get(),
             'sender_name': self.sender_name.get(),
             'password': self.email_password.get(),
@@ -995,79 +1417,209 @@ class MainWindow(tk.Tk):
             'imap_port': int(self.imap_port.get()),
             'enable_imap_check': self.settings.get('enable_imap_check', True),
             'send_interval': self.settings.get('send_interval', 1),
+            'max_attempts': self.settings.get('max_attempts', 3),
+            'retry_backoff': self.settings.get('retry_backoff', 5),
         }
 
+    def _get_template_config(self):
+        """获取模板配置"""
+        return {
+            'email_sign': self.email_sign.get(),
+            'company_name': self.company_name.get()
+        }
+
+    def _run_send_thread(self, send_func):
+        """在后台线程中执行发送
+
+        Args:
+            send_func: 接收 EmailBatchSender 的发送函数
+        """
+        self.send_btn.config(state=tk.DISABLED)
+        self.schedule_btn.config(state=tk.DISABLED)
+        self.stop_btn.config(state=tk.NORMAL)
+
+        email_config = self._get_email_config()
+
         def send_thread():
             try:
                 self.batch_sender = EmailBatchSender(
                     email_config,
-                    progress_callback=self._on_send_progress
-                )
-
-                self.batch_sender.send_batch(
-                    employee_list=selected_employees,
-                    subject_template="{pay_month}工资明细 - {name}",
-                    template_handler=self.template_handler,
-                    template_config={
-                        'email_sign': self.email_sign.get(),
-                        'company_name': self.company_name.get()
-                    }
+                    progress_callback=lambda *args: self.after(0, self._on_send_progress, *args)
                 )
+                send_func(self.batch_sender)
 
                 self.after(0, lambda: self._on_send_complete())
 
+            except CertificateError as e:
+                self.after(0, messagebox.showerror, "证书验证失败", str(e))
+                self.after(0, self._on_send_complete)
             except Exception as e:
-                self.after(0, lambda: messagebox.showerror("发送失败", str(e)))
-                self.after(0, lambda: self._on_send_complete())
+                self.after(0, messagebox.showerror, "发送失败", str(e))
+                self.after(0, self._on_send_complete)
 
         threading.Thread(target=send_thread, daemon=True).start()
 
+    def _start_send(self):
+        if not self._check_send_ready():
+            return
+
+        if self.excel_reader is None or not self.employee_data:
+            messagebox.showerror("错误", "请先加载 Excel 文件")
+            return
+
+        selected_employees = self._get_selected_employees()
+        if not selected_employees:
+            messagebox.showwarning("提示", "请至少选择一个员工")
+            return
+
+        if not self._confirm_validation() or not self._confirm_template_fields(selected_employees):
+            return
+
+        result = messagebox.askyesno("确认发送", f"确定要发送 {len(selected_employees)} 封邮件吗？")
+        if not result:
+            return
+
+        template_config = self._get_template_config()
+        # 按模板分组发送，同一模板的员工连续渲染
+        self._run_send_thread(lambda sender: sender.send_batch(
+            employee_list=self.template_registry.group_by_template(selected_employees),
+            subject_template="{pay_month}工资明细 - {name}",
+            template_handler=self.template_registry,
+            template_config=template_config
+        ))
+
+    def _start_scheduled_send(self):
+        """创建定时发送任务"""
+        if not self._check_send_ready():
+            return
+
+        if self.excel_reader is None or not self.employee_data:
+            messagebox.showerror("错误", "请先加载 Excel 文件")
+            return
+
+        selected_employees = self._get_selected_employees()
+        if not selected_employees:
+            messagebox.showwarning("提示", "请至少选择一个员工")
+            return
+
+        if not self._confirm_validation() or not self._confirm_template_fields(selected_employees):
+            return
+
+        from tkinter import simpledialog
+        start_text = simpledialog.askstring(
+            "定时发送",
+            "请输入开始时间 (格式: 2026-01-05 09:00):",
+            initialvalue=datetime.now().strftime('%Y-%m-%d %H:%M'),
+            parent=self
+        )
+        if not start_text:
+            return
+
+        try:
+            settings = self.app_config.get_settings()
+            schedule = SendSchedule(
+                start_at=datetime.strptime(start_text.strip(), '%Y-%m-%d %H:%M'),
+                windows=SendSchedule.parse_windows(settings['send_window']),
+                daily_quota=settings['daily_quota']
+            )
+        except ValueError as e:
+            messagebox.showerror("错误", f"定时设置无效：\n{e}")
+            return
+
+        quota_text = f"每日最多 {schedule.daily_quota} 封" if schedule.daily_quota else "不限每日数量"
+        result = messagebox.askyesno(
+            "确认定时发送",
+            f"将于 {start_text} 开始发送 {len(selected_employees)} 封邮件\n"
+            f"发送时间段: {settings['send_window'] or '全天'}，{quota_text}\n\n"
+            "发送过程中请保持程序运行，退出后下次启动可继续发送。"
+        )
+        if not result:
+            return
+
+        job = ScheduledJob(
+            employees=self.template_registry.group_by_template(selected_employees),
+            subject_template="{pay_month}工资明细 - {name}",
+            template_config=self._get_template_config(),
+            schedule=schedule,
+            source={'paths': self._get_excel_paths(), 'sheets': 'all' if self.settings['load_all_sheets'] else None}
+        )
+        self.send_queue.add_job(job)
+        self.status_text.set(f"定时发送已创建，{start_text} 开始")
+        self._run_send_thread(lambda sender: sender.send_scheduled(job, self.send_queue, self.template_registry))
+
+    def _check_pending_jobs(self):
+        """启动时检查未完成的定时发送任务"""
+        jobs = self.send_queue.pending_jobs()
+        if not jobs:
+            return
+
+        job = jobs[0]
+        result = messagebox.askyesno(
+            "继续定时发送",
+            f"发现未完成的定时发送任务，剩余 {len(job.pending)} 封\n"
+            f"(创建于 {job.created_at.strftime('%Y-%m-%d %H:%M')})\n\n是否继续发送？"
+        )
+        if not result or not self._check_send_ready():
+            return
+
+        self._run_send_thread(lambda sender: sender.send_scheduled(job, self.send_queue, self.template_registry))
+
     def _stop_send(self):
         if self.batch_sender:
             self.batch_sender.stop()
             self.status_text.set("已停止")
 
     def _get_selected_employees(self):
+        if self.excel_reader is None:
+            return []
         selected = []
         items = self.employee_tree.get_children()
 
         for item in items:
             values = self.employee_tree.item(item, 'values')
             if values[0] == '☑':
-                name = values[1]
-                for emp in self.employee_data:
-                    if emp.get('name') == name:
-                        selected.append(emp)
-                        break
+                employee = self.excel_reader.get_by_id(item)
+                if employee is not None:
+                    selected.append(employee)
 
         return selected
 
     def _on_send_progress(self, current, total, result):
-        progress = (current / total) * 100
+        progress = (current / total) * 100 if total else 0
         self.progress_var.set(progress)
         self.progress_text.set(f"{current}/{total}")
         self.status_text.set("发送中...")
 
-        items = self.employee_tree.get_children()
-        for item in items:
-            values = list(self.employee_tree.item(item, 'values'))
-            if values[1] == result['name']:
-                values[4] = '✓' if result['success'] else '✗'
-                self.employee_tree.item(item, values=values)
-                break
+        row_id = result.get('row_id')
+        if row_id is not None and self.employee_tree.exists(row_id):
+            if result.get('retry_pending'):
+                status = '↻'
+            else:
+                status = '✓' if result['success'] else '✗'
+                if result.get('attempts', 1) > 1:
+                    status += f"({result['attempts']})"
+            self.employee_tree.set(row_id, 'status', status)
 
     def _on_send_complete(self):
         self.send_btn.config(state=tk.NORMAL)
+        self.schedule_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
         self.status_text.set("完成")
 
         if self.batch_sender:
             results = self.batch_sender.get_results()
             success_count = sum(1 for r in results if r['success'])
-            messagebox.showinfo(
-                "发送完成",
-                f"共发送 {len(results)} 封\n成功: {success_count}\n失败: {len(results) - success_count}"
-            )
+            retried_count = sum(1 for r in results if r.get('attempts', 1) > 1)
+            message = f"共发送 {len(results)} 封\n成功: {success_count}\n失败: {len(results) - success_count}\n重试过: {retried_count}"
+
+            failed = [r for r in results if not r['success']]
+            if failed:
+                message += "\n\n失败明细：\n" + "\n".join(
+                    f"{r['name']} <{r['email']}> 尝试 {r.get('attempts', 1)} 次" for r in failed[:10]
+                )
+                if len(failed) > 10:
+                    message += f"\n... 等 {len(failed)} 人"
+            messagebox.showinfo("发送完成", message)
 
     # ==================== 配置和设置 ====================
 
@@ -67,7 +67,7 @@ class PreviewWindow(tk.Toplevel):
             html_content = self.template_handler.render_to_html(
                 self.employee_data,
                 self.template_config
-            )
+            ).decode('utf-8')
 
             # 简单显示（去掉 HTML 标签）
             import re
@@ -88,7 +88,7 @@ class PreviewWindow(tk.Toplevel):
             html_content = self.template_handler.render_to_html(
                 self.employee_data,
                 self.template_config
-            )
+            ).decode('utf-8')
 
             # 创建临时 HTML 文件
             with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
@@ -7,6 +7,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from utils.config import Config
+from core.send_scheduler import SendSchedule
 
 
 class SettingsDialog(tk.Toplevel):
@@ -24,7 +25,7 @@ class SettingsDialog(tk.Toplevel):
         elif dialog_type == "system":
             self.title("系统设置")
             self._create_system_settings()
-            self.geometry("500x350")
+            self.geometry("500x450")
         self.transient(parent)
         self.grab_set()
 
@@ -111,6 +112,26 @@ class SettingsDialog(tk.Toplevel):
         self.vars['send_interval'] = interval_var
         row += 1
 
+        # 定时发送时间段
+        ttk.Label(frame, text="定时发送时间段:").grid(row=row, column=0, sticky=tk.W, pady=5)
+        window_var = tk.StringVar(value=self.config.get('Settings', 'send_window', '09:00-18:00'))
+        ttk.Entry(frame, textvariable=window_var, width=20).grid(row=row, column=1, sticky=tk.W, pady=5)
+        self.vars['send_window'] = window_var
+        row += 1
+
+        # 每日发送额度
+        ttk.Label(frame, text="每日发送额度（0为不限）:").grid(row=row, column=0, sticky=tk.W, pady=5)
+        quota_var = tk.IntVar(value=self.config.get('Settings', 'daily_quota', '0'))
+        ttk.Spinbox(frame, from_=0, to=100000, textvariable=quota_var, width=10).grid(row=row, column=1, sticky=tk.W, pady=5)
+        self.vars['daily_quota'] = quota_var
+        row += 1
+
+        # 读取全部工作表
+        sheets_var = tk.BooleanVar(value=self.config.get('Settings', 'load_all_sheets', 'false').lower() == 'true')
+        ttk.Checkbutton(frame, text="读取 Excel 中的全部工作表", variable=sheets_var).grid(row=row, column=0, columnspan=2, sticky=tk.W, pady=5)
+        self.vars['load_all_sheets'] = sheets_var
+        row += 1
+
         # IMAP 验证
         imap_var = tk.BooleanVar(value=self.config.get('Settings', 'enable_imap_check', 'true').lower() == 'true')
         ttk.Checkbutton(frame, text="启用 IMAP 验证", variable=imap_var).grid(row=row, column=0, columnspan=2, sticky=tk.W, pady=5)
@@ -147,7 +168,11 @@ class SettingsDialog(tk.Toplevel):
                 self.config.set('Settings', 'preview_count', self.vars['preview_count'].get())
                 self.config.set('Settings', 'thread_count', self.vars['thread_count'].get())
                 self.config.set('Settings', 'send_interval', self.vars['send_interval'].get())
+                SendSchedule.parse_windows(self.vars['send_window'].get())
+                self.config.set('Settings', 'send_window', self.vars['send_window'].get())
+                self.config.set('Settings', 'daily_quota', self.vars['daily_quota'].get())
                 self.config.set('Settings', 'enable_imap_check', str(self.vars['enable_imap_check'].get()))
+                self.config.set('Settings', 'load_all_sheets', str(self.vars['load_all_sheets'].get()))
 
             messagebox.showinfo("成功", "设置已保存")
             self.destroy()
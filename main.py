@@ -10,6 +10,7 @@ STFMail - smartMail 工资条邮件群发工具
 
 import sys
 import os
+import multiprocessing
 
 # 添加项目根目录到路径
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -25,4 +26,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # 打包为 exe 后多进程解析 Excel 需要
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ExcelReader 性能测试工具
+
+对每种文件格式、每种读取方式测量解析耗时和峰值内存：
+    eager      一次性读入全部数据
+    streaming  流式逐行读取
+    deferred   延迟解析，按批读取（界面后台加载使用）
+    cached     命中磁盘缓存时的加载
+
+耗时和内存分两次测量：计时时不开启 tracemalloc，避免追踪本身拖慢解析
+
+用法:
+    python tools/benchmark_reader.py --rows 100000 --formats xlsx csv
+    python tools/benchmark_reader.py --files bench_data/payroll_100000.xlsx
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+# 添加项目根目录到路径
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from core.excel_cache import ExcelCache
+from core.excel_reader import ExcelReader
+from tools.generate_payroll import WRITERS, generate_file
+
+
+MODES = ('eager', 'streaming', 'deferred', 'cached')
+
+
+def read_file(path, mode, cache_dir):
+    """按指定方式完整读取一次文件
+
+    Returns:
+        读取到的员工数
+    """
+    if mode == 'eager':
+        return len(ExcelReader(path).data)
+    if mode == 'streaming':
+        reader = ExcelReader(path, streaming=True)
+        count = sum(1 for _ in reader.iter_rows())
+        reader.close()
+        return count
+    if mode == 'deferred':
+        reader = ExcelReader(path, deferred=True)
+        return sum(len(chunk) for chunk in reader.load_chunks())
+    if mode == 'cached':
+        return len(ExcelReader(path, cache=ExcelCache(cache_dir, max_size_mb=4096)).data)
+    raise ValueError(f"未知读取方式: {mode}")
+
+
+def measure(path, mode, repeat):
+    """测量一种读取方式
+
+    Returns:
+        {'rows', 'seconds'（多次取最快）, 'peak_mb'}
+    """
+    cache_dir = tempfile.mkdtemp(prefix='stfmail_bench_')
+    try:
+        if mode == 'cached':
+            # 先写入缓存，之后的测量都是命中缓存
+            read_file(path, mode, cache_dir)
+
+        best = None
+        rows = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = read_file(path, mode, cache_dir)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        tracemalloc.start()
+        read_file(path, mode, cache_dir)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return {'rows': rows, 'seconds': best, 'peak_mb': peak / 1024 / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ExcelReader 性能测试")
+    parser.add_argument('--files', nargs='+', help="要测试的文件（不指定时自动生成）")
+    parser.add_argument('--rows', type=int, default=10000, help="自动生成文件的行数")
+    parser.add_argument('--formats', nargs='+', choices=sorted(WRITERS), default=['xlsx', 'csv'], help="自动生成的格式")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help="读取方式")
+    parser.add_argument('--repeat', type=int, default=3, help="计时重复次数（取最快一次）")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    # 只输出测试结果
+    logging.getLogger('STFMail').setLevel(logging.WARNING)
+
+    temp_dir = None
+    files = args.files
+    if not files:
+        temp_dir = tempfile.mkdtemp(prefix='stfmail_data_')
+        files = []
+        for file_format in args.formats:
+            path = os.path.join(temp_dir, f"payroll_{args.rows}.{file_format}")
+            print(f"生成 {file_format} 测试文件（{args.rows} 行）...")
+            files.append(generate_file(path, file_format, args.rows, seed=args.seed))
+
+    try:
+        print(f"\n{'文件':<28}{'格式':<9}{'方式':<11}{'行数':>9}{'耗时(s)':>10}{'峰值内存(MB)':>14}")
+        for path in files:
+            file_format = ExcelReader.detect_format(path)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            label = f"{os.path.basename(path)} ({size_mb:.1f}MB)"
+            for mode in args.modes:
+                result = measure(path, mode, args.repeat)
+                print(f"{label:<28}{file_format:<9}{mode:<11}{result['rows']:>9}"
+                      f"{result['seconds']:>10.3f}{result['peak_mb']:>14.1f}")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
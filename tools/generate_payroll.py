@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+工资表测试数据生成工具
+
+按 ExcelReader.FIELD_MAPPING 的表头生成 .xls / .xlsx / CSV 工资表，
+用于大数据量下测试读取性能。可配置行数（最多 100 万行）、缺失发放月份、
+空行、重名和错误邮箱的比例；相同的随机种子生成相同的文件。
+生成 .xls 需要 xlwt（requirements.txt 的开发工具部分，或 pip install xlwt），
+.xlsx 和 CSV 只需要 openpyxl
+
+用法:
+    python tools/generate_payroll.py --rows 100000 --formats xlsx csv --output bench_data
+"""
+
+import os
+import sys
+import csv
+import random
+import argparse
+
+# 添加项目根目录到路径
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from openpyxl import Workbook
+from core.excel_reader import ExcelReader
+
+try:
+    import xlwt
+    XLWT_AVAILABLE = True
+except ImportError:
+    XLWT_AVAILABLE = False
+
+
+MAX_ROWS = 1_000_000
+
+# .xls 单个工作表最多 65536 行（含表头）
+XLS_SHEET_ROWS = 65535
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤'
+GIVEN_CHARS = '伟芳娜秀英敏静丽强磊军洋勇艳杰娟涛明超兰霞平刚桂英华玉萍红鹏飞建国晨阳欣怡子轩浩然梓涵雨桐思远嘉怡俊杰文博佳琪宇航'
+
+BAD_EMAILS = (
+    '{user}#example.com',
+    '{user}@',
+    '{user}@example',
+    '{user} @example.com',
+    '{user}@@example.com',
+    '{user}@example..com',
+)
+
+EMAIL_DOMAINS = ('example.com', 'example.cn', 'mail.example.com')
+
+
+def make_name(rng):
+    """生成随机中文姓名"""
+    return rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN_CHARS) for _ in range(rng.choice((1, 2))))
+
+
+def make_salary(rng):
+    """生成一条金额前后一致的工资数据（以分计算，避免浮点误差）
+
+    Returns:
+        {字段: 金额(元)}
+    """
+    expected_days = rng.choice((21, 22, 23))
+    actual_days = max(expected_days - rng.choice((0, 0, 0, 1, 2, 3)), 0)
+
+    base = rng.randrange(3000, 20000) * 100
+    performance = rng.randrange(0, 5000) * 100
+    live = rng.choice((0, 0, 0, rng.randrange(0, 3000) * 100))
+    commission = rng.choice((0, 0, rng.randrange(0, 800000)))
+    bonus = rng.choice((0, 0, 0, rng.randrange(0, 100000)))
+    pre_tax = base + performance + live + commission + bonus
+
+    social = base * 8 // 100
+    housing = base * 7 // 100
+    special = rng.choice((0, 100000, 200000, 300000))
+    deduction = social + housing
+    taxable = max(pre_tax - deduction - special - 500000, 0)
+    tax = taxable * 3 // 100
+    month_index = rng.randrange(1, 13)
+
+    return {
+        'expected_days': expected_days,
+        'actual_days': actual_days,
+        'base_salary': base,
+        'performance_salary': performance,
+        'live_salary': live,
+        'commission': commission,
+        'service_bonus': bonus,
+        'pre_tax_salary': pre_tax,
+        'social_security': social,
+        'housing_fund': housing,
+        'special_deduction': special,
+        'total_deduction': deduction,
+        'accumulated_taxable': taxable * month_index,
+        'accumulated_tax': tax * month_index,
+        'current_tax': tax,
+        'net_salary': pre_tax - deduction - tax,
+    }
+
+
+def generate_rows(count, seed=42, pay_month='2025年12月', missing_month_ratio=0.05,
+                  blank_ratio=0.01, duplicate_name_ratio=0.02, bad_email_ratio=0.01):
+    """生成工资表数据行
+
+    Args:
+        count: 员工行数（不含空行）
+        seed: 随机种子
+        pay_month: 发放月份
+        missing_month_ratio: 发放月份为空的比例
+        blank_ratio: 插入空行的比例
+        duplicate_name_ratio: 与前面员工重名的比例
+        bad_email_ratio: 邮箱格式错误的比例
+
+    Yields:
+        按 FIELD_MAPPING 表头顺序排列的值列表；空行为全 None
+    """
+    if count > MAX_ROWS:
+        raise ValueError(f"行数不能超过 {MAX_ROWS}")
+
+    rng = random.Random(seed)
+    fields = list(ExcelReader.FIELD_MAPPING.values())
+    width = len(fields)
+    names = []
+
+    for index in range(count):
+        if rng.random() < blank_ratio:
+            yield [None] * width
+
+        if names and rng.random() < duplicate_name_ratio:
+            name = rng.choice(names)
+        else:
+            name = make_name(rng)
+            if len(names) < 10000:
+                names.append(name)
+
+        user = f"user{index:07d}"
+        if rng.random() < bad_email_ratio:
+            email = rng.choice(BAD_EMAILS).format(user=user)
+        else:
+            email = f"{user}@{rng.choice(EMAIL_DOMAINS)}"
+
+        values = make_salary(rng)
+        for field in values:
+            if field not in ('expected_days', 'actual_days'):
+                values[field] /= 100
+        values['name'] = name
+        values['email'] = email
+        values['pay_month'] = '' if rng.random() < missing_month_ratio else pay_month
+
+        yield [values[field] for field in fields]
+
+
+def write_csv(path, rows):
+    """写入 CSV（UTF-8 带 BOM，Excel 可直接打开）"""
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(ExcelReader.FIELD_MAPPING))
+        for row in rows:
+            writer.writerow(['' if value is None else value for value in row])
+
+
+def write_xlsx(path, rows):
+    """写入 .xlsx（openpyxl 只写模式，内存占用与行数无关）"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('工资表')
+    sheet.append(list(ExcelReader.FIELD_MAPPING))
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def write_xls(path, rows):
+    """写入 .xls（需要 xlwt），超过单表行数上限时拆分为多个工作表"""
+    if not XLWT_AVAILABLE:
+        raise RuntimeError("生成 .xls 需要安装 xlwt：pip install xlwt")
+
+    headers = list(ExcelReader.FIELD_MAPPING)
+    workbook = xlwt.Workbook(encoding='utf-8')
+    sheet = None
+    row_idx = XLS_SHEET_ROWS + 1
+    sheet_count = 0
+    for row in rows:
+        if row_idx > XLS_SHEET_ROWS:
+            sheet_count += 1
+            sheet = workbook.add_sheet(f"工资表{sheet_count}")
+            for col_idx, header in enumerate(headers):
+                sheet.write(0, col_idx, header)
+            row_idx = 1
+        for col_idx, value in enumerate(row):
+            if value is not None:
+                sheet.write(row_idx, col_idx, value)
+        row_idx += 1
+    workbook.save(path)
+
+
+WRITERS = {
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+    'xls': write_xls,
+}
+
+
+def generate_file(path, file_format, count, **options):
+    """生成一个工资表文件
+
+    Args:
+        path: 输出路径
+        file_format: 'csv' / 'xlsx' / 'xls'
+        count: 员工行数
+        options: 传给 generate_rows 的其他参数
+
+    Returns:
+        输出路径
+    """
+    WRITERS[file_format](path, generate_rows(count, **options))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成工资表测试数据")
+    parser.add_argument('--rows', type=int, default=10000, help=f"员工行数（最多 {MAX_ROWS}）")
+    parser.add_argument('--formats', nargs='+', choices=sorted(WRITERS), default=['xlsx', 'csv'], help="输出格式")
+    parser.add_argument('--output', default='bench_data', help="输出目录")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    parser.add_argument('--pay-month', default='2025年12月', help="发放月份")
+    parser.add_argument('--missing-month', type=float, default=0.05, help="发放月份为空的比例")
+    parser.add_argument('--blank', type=float, default=0.01, help="空行比例")
+    parser.add_argument('--duplicate-name', type=float, default=0.02, help="重名比例")
+    parser.add_argument('--bad-email', type=float, default=0.01, help="错误邮箱比例")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+
+    for file_format in args.formats:
+        path = os.path.join(args.output, f"payroll_{args.rows}.{file_format}")
+        generate_file(
+            path, file_format, args.rows,
+            seed=args.seed,
+            pay_month=args.pay_month,
+            missing_month_ratio=args.missing_month,
+            blank_ratio=args.blank,
+            duplicate_name_ratio=args.duplicate_name,
+            bad_email_ratio=args.bad_email,
+        )
+        print(f"已生成 {path}（{os.path.getsize(path) / 1024 / 1024:.1f} MB）")
+
+
+if __name__ == '__main__':
+    main()
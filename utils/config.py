@@ -7,10 +7,24 @@
 """
 
 import os
+import sys
 import configparser
 from pathlib import Path
 
 
+# 程序所在目录（打包为 exe 时为 exe 所在目录）：缓存、发送队列等数据文件放在这里，
+# 不随启动时的工作目录变化
+if getattr(sys, 'frozen', False):
+    APP_DIR = os.path.dirname(os.path.abspath(sys.executable))
+else:
+    APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def app_path(*parts):
+    """程序目录下的路径"""
+    return os.path.join(APP_DIR, *parts)
+
+
 class Config:
     """配置管理类"""
 
@@ -49,13 +63,23 @@ class Config:
             'template_path': '',
             'email_sign': 'smart',
             'company_name': 'United Field',
+            'template_column': '',
         }
+        # 按列值选择模板：列值 = 模板路径
+        self.config['TemplateMap'] = {}
         # 系统设置
         self.config['Settings'] = {
             'thread_count': '3',
             'preview_count': '3',
             'enable_imap_check': 'true',
             'send_interval': '1',
+            'send_window': '09:00-18:00',
+            'daily_quota': '0',
+            'max_attempts': '3',
+            'retry_backoff': '5',
+            'cache_size_mb': '200',
+            'load_all_sheets': 'false',
+            'deduction_includes_tax': 'false',
         }
         # 最近文件
         self.config['LastFiles'] = {
@@ -118,6 +142,15 @@ class Config:
             'company_name': self.get('Template', 'company_name'),
         }
 
+    def get_template_map(self):
+        """获取按列值选择模板的配置
+
+        Returns:
+            (列名, {列值: 模板路径})
+        """
+        mapping = dict(self.config['TemplateMap']) if 'TemplateMap' in self.config else {}
+        return self.get('Template', 'template_column'), mapping
+
     def get_settings(self):
         """获取系统设置"""
         return {
@@ -125,4 +158,11 @@ class Config:
             'preview_count': int(self.get('Settings', 'preview_count', '3')),
             'enable_imap_check': self.get('Settings', 'enable_imap_check', 'true').lower() == 'true',
             'send_interval': int(self.get('Settings', 'send_interval', '1')),
+            'send_window': self.get('Settings', 'send_window', '09:00-18:00'),
+            'daily_quota': int(self.get('Settings', 'daily_quota', '0')),
+            'max_attempts': int(self.get('Settings', 'max_attempts', '3')),
+            'retry_backoff': int(self.get('Settings', 'retry_backoff', '5')),
+            'cache_size_mb': int(self.get('Settings', 'cache_size_mb', '200')),
+            'load_all_sheets': self.get('Settings', 'load_all_sheets', 'false').lower() == 'true',
+            'deduction_includes_tax': self.get('Settings', 'deduction_includes_tax', 'false').lower() == 'true',
         }